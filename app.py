@@ -1,25 +1,28 @@
-import json
-from threading import Thread
+import asyncio
+import time
 
-from fastapi import FastAPI, Body
+from fastapi import FastAPI, Body, Depends, HTTPException, Request
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-import pandas as pd
-from pathlib import Path
 
 from starlette.staticfiles import StaticFiles
 
 # === Import project modules ===
-from device_manager import DeviceManager
-from home_manager import HomeManager
+# Only what the CRUD/dashboard endpoints need is imported here. The RL environment stack,
+# torch (training/export) and matplotlib (KPI plots) load on first use of an endpoint
+# that needs them, so a cold start only pays for FastAPI + NumPy.
 from impact_calibrator import ImpactCalibrator
-from main import run_live_agent
-from rl.train_rl import train_rl_agent
-from rl.rl_environment import SmartHomeEnv
-from rl.rl_agent import RLAgent
+from live_events import live_events, format_sse
+from live_log import live_snapshot
+from metrics import HTTP_REQUEST_SECONDS, registry as metrics_registry
+from repository import Repository, get_repository
+from model_registry import get_model_registry
+from optimizer_scheduler import OptimizerScheduler
+from inference_server import BatchedPolicyServer
+from kpi_plots import DEFAULT_MAX_POINTS as DEFAULT_PLOT_POINTS, PLOT_MEDIA_TYPES, get_kpi_plot_renderer
+from kpi_store import COLUMNS as KPI_COLUMNS, get_kpi_store, records as kpi_records
 from rl.rl_utils import get_user_location, get_real_outdoor_temp
-from training_kpi_logger import TrainingKPI
-from lstm_predictor import LSTMPredictor
-from paths import DATA_DIR, LOGS_DIR, MODELS_DIR
+from training_jobs import JobConflictError, TrainingJobManager
 
 # === Initialize FastAPI app ===
 app = FastAPI(title="AI Energy Optimization API")
@@ -34,81 +37,103 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    # label by route template (/api/train/{job_id}), not the raw path, to bound cardinality
+    route = request.scope.get("route")
+    HTTP_REQUEST_SECONDS.observe(
+        time.perf_counter() - started,
+        method=request.method,
+        route=getattr(route, "path", None) or "other",
+        status=response.status_code,
+    )
+    return response
+
+
 # === 🌍 SYSTEM INITIALIZATION ===
 @app.get("/api/init")
-def init_system():
-    calibrator = ImpactCalibrator()
-    calibrator.calibrate()
-    devices = DeviceManager()
-    homes = HomeManager()
-
-    return {
-        "message": "System initialized successfully",
-        "devices_count": len(devices.get_all_devices()),
-        "homes_count": len(homes.homes)
-    }
+def init_system(repo: Repository = Depends(get_repository)):
+    with repo.transaction() as r:
+        # calibrate against the in-memory catalog: the file may lag behind a pending debounced write
+        ImpactCalibrator(devices=r.devices.get_all_devices()).calibrate()
+        return {
+            "message": "System initialized successfully",
+            "devices_count": len(r.devices.get_all_devices()),
+            "homes_count": len(r.homes.homes)
+        }
 
 
 # === 🏠 HOME MANAGEMENT ===
 @app.get("/api/homes")
-def list_homes():
-    manager = HomeManager()
-    return manager.homes
+def list_homes(repo: Repository = Depends(get_repository)):
+    return repo.get_homes()
 
 
 @app.post("/api/homes/add")
-def add_home(home_name: str = Body(...), comfort_range: tuple = Body((21, 25))):
-    manager = HomeManager()
-    return manager.add_home(home_name, comfort_range)
+def add_home(home_name: str = Body(...), comfort_range: tuple = Body((21, 25)),
+             repo: Repository = Depends(get_repository)):
+    with repo.transaction() as r:
+        return r.homes.add_home(home_name, comfort_range)
 
 
 @app.post("/api/homes/delete")
-def delete_home(home_name: str = Body(...)):
-    manager = HomeManager()
-    return manager.delete_home(home_name)
+def delete_home(home_name: str = Body(...), repo: Repository = Depends(get_repository)):
+    with repo.transaction() as r:
+        return r.homes.delete_home(home_name)
 
 
 @app.post("/api/rooms/add")
-def add_room(home_name: str = Body(...), room_name: str = Body(...)):
-    manager = HomeManager()
-    return manager.add_room(home_name, room_name)
+def add_room(home_name: str = Body(...), room_name: str = Body(...), repo: Repository = Depends(get_repository)):
+    with repo.transaction() as r:
+        return r.homes.add_room(home_name, room_name)
 
 
 @app.post("/api/rooms/rename")
-def rename_room(home_name: str = Body(...), old_name: str = Body(...), new_name: str = Body(...)):
-    manager = HomeManager()
-    return manager.rename_room(home_name, old_name, new_name)
+def rename_room(home_name: str = Body(...), old_name: str = Body(...), new_name: str = Body(...),
+                repo: Repository = Depends(get_repository)):
+    with repo.transaction() as r:
+        return r.homes.rename_room(home_name, old_name, new_name)
 
 
 @app.post("/api/rooms/delete")
-def delete_room(home_name: str = Body(...), room_name: str = Body(...)):
-    manager = HomeManager()
-    return manager.delete_room(home_name, room_name)
+def delete_room(home_name: str = Body(...), room_name: str = Body(...), repo: Repository = Depends(get_repository)):
+    with repo.transaction() as r:
+        return r.homes.delete_room(home_name, room_name)
 
 
 @app.post("/api/rooms/assign_device")
-def assign_device(home_name: str = Body(...), room_name: str = Body(...), device_name: str = Body(...)):
-    manager = HomeManager()
-    return manager.assign_device(home_name, room_name, device_name)
+def assign_device(home_name: str = Body(...), room_name: str = Body(...), device_name: str = Body(...),
+                  repo: Repository = Depends(get_repository)):
+    with repo.transaction() as r:
+        return r.homes.assign_device(home_name, room_name, device_name)
+
+
+@app.post("/api/rooms/assign_devices")
+def assign_devices(home_name: str = Body(...), room_name: str = Body(...), device_names: list = Body(...),
+                   repo: Repository = Depends(get_repository)):
+    with repo.transaction() as r:
+        return r.homes.assign_devices(home_name, room_name, device_names)
 
 
 # === ⚙️ DEVICE MANAGEMENT ===
 @app.get("/api/devices")
-def list_devices():
-    manager = DeviceManager()
-    return manager.get_all_devices()
+def list_devices(repo: Repository = Depends(get_repository)):
+    return repo.get_devices()
 
 
 @app.post("/api/devices/add")
-def add_device(name: str = Body(...), base_kWh: float = Body(...), permissions: list = Body([])):
-    manager = DeviceManager()
-    return manager.add_device(name, base_kWh, permissions)
+def add_device(name: str = Body(...), base_kWh: float = Body(...), permissions: list = Body([]),
+               repo: Repository = Depends(get_repository)):
+    with repo.transaction() as r:
+        return r.devices.add_device(name, base_kWh, permissions)
 
 
 @app.post("/api/devices/permissions/add")
-def add_permission(name: str = Body(...), permission: str = Body(...)):
-    manager = DeviceManager()
-    return manager.add_permission(name, permission)
+def add_permission(name: str = Body(...), permission: str = Body(...), repo: Repository = Depends(get_repository)):
+    with repo.transaction() as r:
+        return r.devices.add_permission(name, permission)
 
 
 # === 🌤️ WEATHER ===
@@ -126,31 +151,101 @@ def get_weather():
 
 
 # === 🤖 TRAINING ===
+training_jobs = TrainingJobManager()
+
+
+@app.on_event("shutdown")
+def stop_training_jobs():
+    training_jobs.shutdown(wait=False)
+    get_kpi_plot_renderer().shutdown()
+    get_repository().flush()
+
+
 @app.post("/api/train")
-def train_agent(home: str = Body(...), episodes: int = Body(30)):
-    model_path = MODELS_DIR / f"checkpoints/{home.lower().replace(' ', '_')}_final.pth"
-    train_rl_agent(HOME_NAME=home, NUM_EPISODES=episodes)
+def train_agent(home: str = Body(...), episodes: int = Body(30), hyperparameters: dict = Body({})):
+    """
+    Queue a training job and return right away; poll /api/train/{job_id} for progress.
+    """
+    try:
+        job = training_jobs.submit(home, episodes, hyperparameters)
+    except JobConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    model_path = get_model_registry().checkpoint_path(home)
     return {
-        "message": f"Training complete for home '{home}'",
+        "message": f"Training queued for home '{home}'",
+        "job_id": job["job_id"],
+        "status": job["status"],
         "episodes": episodes,
         "model_path": str(model_path)
     }
 
 
+@app.get("/api/train")
+def list_training_jobs():
+    return training_jobs.list_jobs()
+
+
+@app.get("/api/train/{job_id}")
+def training_job_status(job_id: str):
+    job = training_jobs.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+    return job
+
+
+@app.post("/api/train/{job_id}/cancel")
+def cancel_training_job(job_id: str):
+    job = training_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+    return job
+
+
 # === ☀️ SIMULATION ===
+@app.get("/api/models")
+def model_registry_stats():
+    """Policies currently held in memory and cache hit/miss counts."""
+    return get_model_registry().stats()
+
+
+@app.get("/api/models/{home}")
+def model_metadata(home: str):
+    meta = get_model_registry().metadata(home)
+    if meta["version"] is None:
+        raise HTTPException(status_code=404, detail=f"No trained model for home '{home}'")
+    return meta
+
+
+@app.post("/api/models/{home}/export")
+def export_model(home: str, formats: list[str] = Body(["numpy", "torchscript"], embed=True)):
+    """Write TorchScript / ONNX / NumPy inference artifacts next to the home's checkpoint."""
+    from rl.policy_export import export_checkpoint
+
+    path = get_model_registry().checkpoint_path(home)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail=f"No trained model for home '{home}'")
+    try:
+        written = export_checkpoint(path, formats=formats)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {fmt: str(p) for fmt, p in written.items()}
+
+
 @app.post("/api/simulate/day")
 def simulate_day(home: str = Body(...)):
-    env = SmartHomeEnv(home_name=home)
-    model_path = MODELS_DIR / f"checkpoints/{home.lower().replace(' ', '_')}_final.pth"
-    agent = RLAgent(state_size=env.state_size, action_size=len(env.action_space))
+    from forecast import get_forecaster
+    from rl.rl_environment import SmartHomeEnv
 
-    agent.load_model(model_path)
-    agent.epsilon = 0.0
+    env = SmartHomeEnv(home_name=home, forecaster=get_forecaster())
+    # cached inference-only policy: repeated simulations of a home skip loading entirely
+    policy, model_info = get_model_registry().get(home, env.state_size, len(env.action_space))
 
     total_reward, total_energy, temps = 0, 0, []
     state = env.reset()
     for hour in range(24):
-        action_idx = agent.act(state)
+        action_idx = policy.act(state)
         next_state, reward, done, info = env.step(action_idx)
         total_reward += reward
         total_energy += info["energy_used"]
@@ -163,32 +258,87 @@ def simulate_day(home: str = Body(...)):
         "total_reward": total_reward,
         "total_energy_kWh": total_energy,
         "avg_temp": sum(temps) / len(temps),
-        "comfort_range": [env.comfort_min, env.comfort_max]
+        "comfort_range": [env.comfort_min, env.comfort_max],
+        "model": {k: model_info.get(k) for k in ("version", "episodes", "trained", "saved_at")}
     }
 
 
-running_threads = {}
+MAX_EVAL_SCENARIOS = 100_000  # one vectorized env per scenario
+
+
+@app.post("/api/simulate/evaluate")
+def evaluate_home_policy(
+    home: str = Body(...),
+    outdoor_temps: list[float] | None = Body(None),
+    indoor_temps: list[float] | None = Body(None),
+    comfort_ranges: list[tuple[float, float]] | None = Body(None),
+    samples: int = Body(0),
+    seed: int = Body(0),
+    horizon: int = Body(24),
+):
+    """
+    Evaluate the home's policy over many scenarios in one vectorized rollout and return
+    mean/p5/p50/p95 of reward, energy and comfort violation. By default a fixed grid
+    (outdoor 10–40°C × start 20–26°C, home comfort band), so repeated calls agree;
+    samples > 0 draws that many random scenarios from `seed` instead.
+    """
+    from forecast import get_forecaster
+    from rl.policy_eval import evaluate_policy, sample_scenarios, scenario_grid, scenario_grid_size
+    from rl.vec_environment import VecSmartHomeEnv
+
+    if samples < 0 or samples > MAX_EVAL_SCENARIOS or not 1 <= horizon <= 24 * 7:
+        raise HTTPException(status_code=400, detail="samples must be 0–100000 and horizon 1–168")
+    if samples:
+        scenarios = sample_scenarios(samples, seed=seed, comfort_ranges=comfort_ranges)
+    else:
+        # sized before it is built: the grid is the product of three client-supplied lists
+        if scenario_grid_size(outdoor_temps, indoor_temps, comfort_ranges) > MAX_EVAL_SCENARIOS:
+            raise HTTPException(status_code=400, detail="scenario grid must have at most 100000 scenarios")
+        scenarios = scenario_grid(outdoor_temps, indoor_temps, comfort_ranges)
+    if len(scenarios["outdoor_temp"]) == 0:
+        raise HTTPException(status_code=400, detail="scenario grid is empty")
+
+    env = VecSmartHomeEnv(home, num_envs=len(scenarios["outdoor_temp"]), max_steps=horizon,
+                          forecaster=get_forecaster())
+    policy, model_info = get_model_registry().get(home, env.state_size, len(env.action_space))
+    report = evaluate_policy(policy, scenarios, horizon=horizon, env=env)
+    report["home"] = home
+    report["model"] = {k: model_info.get(k) for k in ("version", "episodes", "trained", "saved_at")}
+    return report
+
+
+# === 🔁 LIVE OPTIMIZER ===
+def _live_controller(home_name):
+    from main import LiveController  # the RL environment stack loads with the first optimizer
+
+    return LiveController(home_name)
+
+
+inference_server = BatchedPolicyServer(max_wait_ms=5)
+optimizer = OptimizerScheduler(controller_factory=_live_controller, inference=inference_server)
+
+
+@app.on_event("startup")
+async def start_optimizer_scheduler():
+    await optimizer.start()
+
+
+@app.on_event("shutdown")
+async def stop_optimizer_scheduler():
+    await optimizer.shutdown()
 
 
 @app.post("/api/activate_optimizer")
-def activate_optimizer(home: str = "Default", interval_sec: int = 3600):
+async def activate_optimizer(home: str = "Default", interval_sec: int = 3600):
     """
     Start the live RL optimizer for a specific home.
-    Runs asynchronously in a background thread.
+    The home's control loop runs as a task on the shared optimizer scheduler.
+    The optimizer routes are async so scheduler state is only touched on the event loop.
     """
-    def background_run():
-        try:
-            run_live_agent(home_name=home, interval_sec=interval_sec, continuous=True)
-        except Exception as e:
-            print(f"⚠️ Live optimizer crashed for {home}: {e}")
-
-    if home in running_threads and running_threads[home].is_alive():
+    started = await optimizer.activate(home, interval_sec)
+    if started is None:
         return {"status": "already_running", "home": home}
 
-    thread = Thread(target=background_run, daemon=True)
-    thread.start()
-    running_threads[home] = thread
-
     return {
         "status": "started",
         "home": home,
@@ -197,39 +347,148 @@ def activate_optimizer(home: str = "Default", interval_sec: int = 3600):
     }
 
 
+@app.get("/api/optimizer")
+async def list_optimizers():
+    """Status and health of every home known to the optimizer scheduler."""
+    return optimizer.list_homes()
+
+
+@app.get("/api/optimizer/inference")
+def inference_metrics():
+    """Batch size and latency of the shared policy inference server."""
+    return inference_server.metrics()
+
+
+def _optimizer_action(action, home):
+    info = action(home)
+    if info is None:
+        raise HTTPException(status_code=404, detail=f"No optimizer for home '{home}'.")
+    return info
+
+
+@app.post("/api/optimizer/stop")
+async def stop_optimizer(home: str = "Default"):
+    info = await optimizer.stop(home)
+    if info is None:
+        raise HTTPException(status_code=404, detail=f"No optimizer for home '{home}'.")
+    return info
+
+
+@app.post("/api/optimizer/pause")
+async def pause_optimizer(home: str = "Default"):
+    return _optimizer_action(optimizer.pause, home)
+
+
+@app.post("/api/optimizer/resume")
+async def resume_optimizer(home: str = "Default"):
+    return _optimizer_action(optimizer.resume, home)
+
+
 @app.get("/api/live_data")
 def live_data(home: str = "Default"):
-    path = LOGS_DIR / home / f"{home.lower().replace(' ', '_')}_live_log.json"
-    if path.exists():
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)["step"[-1]]
-    return {"status": "no_data"}
+    snapshot = live_snapshot(home)
+    if snapshot is None or not snapshot["steps"]:
+        return {"status": "no_data"}
+    return {**snapshot, "latest": snapshot["steps"][-1]}
+
+
+@app.get("/api/live/stream")
+async def live_stream(request: Request, home: str = "Default"):
+    """
+    Server-Sent Events feed of a home's live optimizer: one "snapshot" event with the
+    current window, then one "step" event per new record as run_live_agent publishes it.
+    """
+    queue = live_events.subscribe(home)
+
+    async def events():
+        try:
+            snapshot = live_snapshot(home)
+            if snapshot is not None:
+                yield format_sse(snapshot, event="snapshot")
+            while True:
+                try:
+                    record = await asyncio.wait_for(queue.get(), timeout=15)
+                    yield format_sse(record, event="step")
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+        finally:
+            live_events.unsubscribe(home, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# === 📈 METRICS ===
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Prometheus text exposition; running training jobs contribute their latest snapshot."""
+    return PlainTextResponse(
+        metrics_registry.render(overlays=training_jobs.running_metrics()),
+        media_type="text/plain; version=0.0.4",
+    )
 
 
 # === 📊 KPIS ===
 @app.get("/api/kpis")
-def get_kpi_summary():
-    kpi_path = LOGS_DIR / "training_kpis.csv"
-    if not kpi_path.exists():
+def get_kpi_summary(home: str = "Default"):
+    """Running aggregates over the home's whole training history (no file scan)."""
+    summary = get_kpi_store(home).summary()
+    if summary is None:
         return {"error": "No KPI data found."}
-
-    df = pd.read_csv(kpi_path)
-    summary = {
-        "episodes": len(df),
-        "avg_reward": float(df["reward"].mean()),
-        "avg_energy_kWh": float(df["total_energy_kWh"].mean()),
-        "avg_temp": float(df["avg_temp"].mean()),
-        "final_epsilon": float(df["epsilon"].iloc[-1]),
-    }
     return summary
 
 
 @app.get("/api/kpis/full")
-def get_full_kpi_log():
-    kpi_path = LOGS_DIR / "training_kpis.csv"
-    if not kpi_path.exists():
+def get_full_kpi_log(
+        home: str = "Default",
+        start_episode: int | None = None,
+        end_episode: int | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        run: int | None = None,
+        limit: int | None = None,
+):
+    """KPI rows, optionally restricted to an episode range, time range (ISO) and/or run."""
+    store = get_kpi_store(home)
+    if len(store) == 0:
         return {"error": "No KPI file found."}
-    return pd.read_csv(kpi_path).to_dict(orient="records")
+    try:
+        rows = store.query(start_episode=start_episode, end_episode=end_episode, since=since, until=until,
+                           run=run, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return kpi_records(rows)
+
+
+@app.get("/api/kpis/series")
+def get_kpi_series(home: str = "Default", columns: str = "reward,total_energy_kWh,epsilon", max_points: int = 500):
+    """Downsampled chart series: bucket means/min/max over the storage order."""
+    names = [c.strip() for c in columns.split(",") if c.strip()]
+    unknown = [c for c in names if c not in KPI_COLUMNS]
+    if unknown or max_points < 1:
+        raise HTTPException(status_code=400, detail=f"Unknown KPI columns {unknown}" if unknown
+                            else "max_points must be >= 1")
+    return get_kpi_store(home).downsample(names, max_points=max_points)
+
+
+@app.get("/api/kpis/plot")
+async def get_kpi_plot(home: str = "Default", format: str = "png", max_points: int = DEFAULT_PLOT_POINTS):
+    """KPI chart rendered on the plot worker thread; cached until new episodes are logged."""
+    if max_points < 1:
+        raise HTTPException(status_code=400, detail="max_points must be >= 1")
+    try:
+        future = get_kpi_plot_renderer().submit(home, fmt=format, max_points=max_points)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    path = await asyncio.wrap_future(future)
+    return FileResponse(path, media_type=PLOT_MEDIA_TYPES[format])
 
 
 app.mount("/", StaticFiles(directory="static", html=True), name="static")
@@ -0,0 +1,102 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+# Attributes every LogRecord has; anything else came in through `extra=` and is a field
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+ROOT_LOGGER = "smarthome"
+_configured = False
+_configure_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg plus any `extra=` fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets at most `burst` records per (logger, message template) through every
+    `per_sec` seconds. The next record let through carries `suppressed=<n>`, so a
+    sensor failing on every step shows up once per window instead of once per step.
+    """
+
+    def __init__(self, burst=5, per_sec=60.0):
+        super().__init__()
+        self.burst = burst
+        self.per_sec = per_sec
+        self._windows = {}  # key -> [window start, emitted, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.per_sec:
+                suppressed = window[2] if window else 0
+                window = self._windows[key] = [now, 0, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+            if window[1] >= self.burst:
+                window[2] += 1
+                return False
+            window[1] += 1
+            return True
+
+
+def configure_logging(level=None, fmt=None, stream=None, burst=None, per_sec=None):
+    """
+    Set up the "smarthome" logger tree once. Defaults come from the environment:
+      LOG_LEVEL   (WARNING)  — per-step/per-episode messages are DEBUG/INFO, so silent by default
+      LOG_FORMAT  (json)     — "json" lines or "text"
+      LOG_RATE_BURST / LOG_RATE_PER_SEC (5 / 60) — rate limit per message template
+    Calling it again reconfigures (e.g. a CLI raising the level to INFO).
+    """
+    global _configured
+    with _configure_lock:
+        logger = logging.getLogger(ROOT_LOGGER)
+        level = level or os.environ.get("LOG_LEVEL", "WARNING")
+        fmt = fmt or os.environ.get("LOG_FORMAT", "json")
+        burst = burst if burst is not None else int(os.environ.get("LOG_RATE_BURST", 5))
+        per_sec = per_sec if per_sec is not None else float(os.environ.get("LOG_RATE_PER_SEC", 60))
+
+        handler = logging.StreamHandler(stream or sys.stderr)
+        handler.setFormatter(
+            JsonFormatter() if fmt == "json"
+            else logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+        )
+        handler.addFilter(RateLimitFilter(burst=burst, per_sec=per_sec))
+
+        for old in list(logger.handlers):
+            logger.removeHandler(old)
+        logger.addHandler(handler)
+        logger.setLevel(level.upper() if isinstance(level, str) else level)
+        logger.propagate = False
+        _configured = True
+        return logger
+
+
+def get_logger(name):
+    """Logger under the "smarthome" tree, configured from the environment on first use."""
+    if not _configured:
+        configure_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
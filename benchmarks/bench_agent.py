@@ -0,0 +1,39 @@
+import numpy as np
+
+from benchmarks.harness import benchmark
+from rl.rl_agent import RLAgent
+
+STATE_SIZE, ACTION_SIZE = 2, 48
+
+
+def setup_agent(batch_size):
+    agent = RLAgent(STATE_SIZE, ACTION_SIZE, memory_size=10_000, seed=0)
+    rng = np.random.default_rng(0)
+    n = 10_000
+    agent.remember_batch(
+        rng.uniform(15, 30, (n, STATE_SIZE)).astype(np.float32),
+        rng.integers(ACTION_SIZE, size=n),
+        rng.normal(-5, 3, n).astype(np.float32),
+        rng.uniform(15, 30, (n, STATE_SIZE)).astype(np.float32),
+        rng.random(n) < 1 / 24,
+    )
+    return agent, batch_size
+
+
+@benchmark(setup=setup_agent, params=[32, 64, 128, 256], number=20)
+def replay(state):
+    agent, batch_size = state
+    agent.replay(batch_size=batch_size)
+
+
+def setup_act(batch_size):
+    agent = RLAgent(STATE_SIZE, ACTION_SIZE, epsilon=0.0, seed=0)
+    states = np.random.default_rng(0).uniform(15, 30, (batch_size, STATE_SIZE)).astype(np.float32)
+    return agent, states
+
+
+@benchmark(setup=setup_act, params=[1, 64], number=50, unit="decision")
+def act_batch(state):
+    agent, states = state
+    agent.act_batch(states)
+    return len(states)
@@ -0,0 +1,38 @@
+from fastapi.testclient import TestClient
+
+from benchmarks.harness import benchmark
+
+REQUESTS = 20
+
+
+def setup_client(_):
+    import app
+
+    # no context manager: startup hooks (optimizer scheduler) are not started
+    return TestClient(app.app)
+
+
+def _endpoint(method, path, **kwargs):
+    def run(client):
+        for _ in range(REQUESTS):
+            response = client.request(method, path, **kwargs)
+            response.raise_for_status()
+        return REQUESTS
+    return run
+
+
+ENDPOINTS = {
+    "homes": ("GET", "/api/homes", {}),
+    "devices": ("GET", "/api/devices", {}),
+    "weather": ("GET", "/api/weather", {}),
+    "models": ("GET", "/api/models/Default", {}),
+    "simulate_day": ("POST", "/api/simulate/day", {"json": "Default"}),
+    "simulate_evaluate": ("POST", "/api/simulate/evaluate", {"json": {"home": "Default"}}),
+    "live_data": ("GET", "/api/live_data", {"params": {"home": "Default"}}),
+    "kpis": ("GET", "/api/kpis", {}),
+}
+
+for _name, (_method, _path, _kwargs) in ENDPOINTS.items():
+    benchmark(name=f"bench_api.{_name}", setup=setup_client, repeat=3, unit="request")(
+        _endpoint(_method, _path, **_kwargs)
+    )
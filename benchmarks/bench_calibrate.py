@@ -0,0 +1,40 @@
+import json
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.harness import benchmark
+from impact_calibrator import ImpactCalibrator
+
+# Permission vocabulary of the real catalog plus per-device modes, so larger
+# catalogs also grow the keyword set
+VERBS = ["turn_on", "turn_off", "set_low", "set_medium", "set_high", "eco_mode", "standard_mode",
+         "quick_wash", "keep_warm", "defrost", "boost", "night_mode"]
+
+
+def synthetic_catalog(num_devices, seed=0):
+    rng = np.random.default_rng(seed)
+    catalog = {}
+    for i in range(num_devices):
+        permissions = list(rng.choice(VERBS, size=4, replace=False)) + [f"profile{i % 500}_mode"]
+        catalog[f"Device {i}"] = {"base_kWh": round(float(rng.uniform(0.05, 4.0)), 3), "permissions": permissions}
+    return catalog
+
+
+def setup_calibrator(num_devices):
+    workdir = Path(tempfile.mkdtemp(prefix="bench_calibrate_"))
+    catalog_path = workdir / "devices_catalog.json"
+    catalog_path.write_text(json.dumps(synthetic_catalog(num_devices)), encoding="utf-8")
+    return ImpactCalibrator(catalog_path=catalog_path, output_path=workdir / "impact_map.json")
+
+
+@benchmark(setup=setup_calibrator, params=[10, 100, 1000, 10_000])
+def calibrate_full(calibrator):
+    calibrator.calibrate(incremental=False)
+
+
+@benchmark(setup=setup_calibrator, params=[10, 100, 1000, 10_000])
+def calibrate_incremental(calibrator):
+    # map already complete after the warm-up call → measures the no-change path
+    calibrator.calibrate(incremental=True)
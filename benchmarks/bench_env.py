@@ -0,0 +1,37 @@
+import numpy as np
+
+from benchmarks.harness import benchmark
+from rl.rl_environment import SmartHomeEnv
+from rl.vec_environment import VecSmartHomeEnv
+
+STEPS = 2400  # 100 simulated days
+
+
+def setup_env(_):
+    return SmartHomeEnv(home_name="Default", mode="sim", seed=0)
+
+
+@benchmark(setup=setup_env, unit="step")
+def env_step(env):
+    rng = np.random.default_rng(0)
+    actions = rng.integers(len(env.action_space), size=STEPS)
+    env.reset(seed=0)
+    for action in actions:
+        env.step(int(action))
+        if env.step_count >= 24:
+            env.reset()
+    return STEPS
+
+
+def setup_vec_env(num_envs):
+    return VecSmartHomeEnv("Default", num_envs=num_envs, seed=0)
+
+
+@benchmark(setup=setup_vec_env, params=[16, 256], unit="step")
+def vec_env_step(env):
+    rng = np.random.default_rng(0)
+    actions = rng.integers(len(env.action_space), size=(24, env.num_envs))
+    env.reset(seed=0)
+    for step_actions in actions:
+        env.step(step_actions)
+    return 24 * env.num_envs
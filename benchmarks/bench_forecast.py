@@ -0,0 +1,66 @@
+import numpy as np
+import torch
+
+from benchmarks.harness import benchmark
+from forecast import FEATURE_COLS
+from lstm_predictor import LSTMPredictor
+
+N_FEATURES = len(FEATURE_COLS)
+
+
+class _SequenceModel(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.lstm = torch.nn.LSTM(N_FEATURES, 32, batch_first=True)
+        self.head = torch.nn.Linear(32, 2)
+
+    def forward(self, x, hidden=None):
+        y, hidden = self.lstm(x, hidden)
+        return self.head(y), hidden
+
+
+def _predictor(model):
+    # same wiring as load_model, without a file on disk
+    predictor = LSTMPredictor()
+    predictor.model = model.eval()
+    predictor.is_sequence = any(isinstance(m, torch.nn.RNNBase) for m in model.modules())
+    return predictor
+
+
+def setup_mlp(batch_size):
+    torch.manual_seed(0)
+    model = torch.nn.Sequential(torch.nn.Linear(N_FEATURES, 64), torch.nn.ReLU(), torch.nn.Linear(64, 2))
+    features = np.random.default_rng(0).random((batch_size, N_FEATURES), dtype=np.float32)
+    return _predictor(model), features
+
+
+@benchmark(setup=setup_mlp, params=[1, 24, 1024], number=50, unit="row")
+def predict_batch(state):
+    predictor, features = state
+    predictor.predict_batch(features)
+    return len(features)
+
+
+@benchmark(setup=setup_mlp, params=[24], number=5, unit="row")
+def predict_per_row(state):
+    """The pre-batch path: one predict() call per feature vector."""
+    predictor, features = state
+    for row in features:
+        predictor.predict(row)
+    return len(features)
+
+
+def setup_stream(num_streams):
+    torch.manual_seed(0)
+    features = np.random.default_rng(0).random((24, num_streams, N_FEATURES), dtype=np.float32)
+    return _predictor(_SequenceModel()), features
+
+
+@benchmark(setup=setup_stream, params=[16, 256], number=5, unit="row")
+def stream_day(state):
+    """24 stateful steps of N streams (a vectorized rollout feeding one hour at a time)."""
+    predictor, features = state
+    predictor.reset_state()
+    for hour in features:
+        predictor.predict_batch(hour, stateful=True)
+    return features.shape[0] * features.shape[1]
@@ -0,0 +1,31 @@
+import subprocess
+import sys
+
+from benchmarks.harness import benchmark
+
+# Must not be loaded by `import app`: they belong to training/simulation/plot endpoints
+HEAVY_MODULES = ("torch", "pandas", "matplotlib", "tqdm", "xgboost", "main", "rl.rl_environment")
+
+SCRIPTS = {
+    # fresh interpreter importing the API module
+    "import": "import app",
+    # container cold start: import + first CRUD request answered
+    "first_request": (
+        "import app\n"
+        "from fastapi.testclient import TestClient\n"
+        "TestClient(app.app).get('/api/homes').raise_for_status()"
+    ),
+}
+CHECK = (
+    "\nimport sys\n"
+    f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+    "sys.exit(f'heavy modules loaded at startup: {heavy}' if heavy else 0)"
+)
+
+
+@benchmark(params=list(SCRIPTS), repeat=5)
+def cold_start(kind):
+    """Wall time of a new Python process running the script (interpreter start included)."""
+    proc = subprocess.run([sys.executable, "-c", SCRIPTS[kind] + CHECK], capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
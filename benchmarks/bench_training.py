@@ -0,0 +1,19 @@
+from benchmarks.harness import benchmark
+from rl.train_rl import train_rl_agent, train_rl_agent_vec
+
+EPISODES = 5
+
+
+# Seeded runs: simulated weather/sensors, no resume, nothing carried over between repeats
+@benchmark(repeat=3, unit="episode")
+def train_episodes(_):
+    train_rl_agent(HOME_NAME="Default", NUM_EPISODES=EPISODES, SAVE_EVERY=EPISODES + 1,
+                   KEEP_REPLAY=False, SEED=0)
+    return EPISODES
+
+
+@benchmark(repeat=3, unit="episode")
+def train_episodes_vec(_):
+    result = train_rl_agent_vec(HOME_NAME="Default", NUM_ENVS=16, NUM_EPISODES=64, SAVE_EVERY=10_000,
+                                KEEP_REPLAY=False, SEED=0)
+    return result["episodes"]
@@ -0,0 +1,58 @@
+import statistics
+import time
+
+# name -> Benchmark, filled by the @benchmark decorator when bench_*.py modules are imported
+REGISTRY = {}
+
+
+class Benchmark:
+    """
+    One timed function, asv-style: setup(param) builds the state outside the timing,
+    func(state) is the measured body and may return the number of work items it
+    processed (steps, requests, …) so the report includes a rate.
+    """
+
+    def __init__(self, name, func, setup=None, params=None, number=1, repeat=5, unit="op"):
+        self.name = name
+        self.func = func
+        self.setup = setup
+        self.params = params or [None]
+        self.number = number
+        self.repeat = repeat
+        self.unit = unit
+
+    def run(self, param):
+        state = self.setup(param) if self.setup else param
+        self.func(state)  # warm-up: imports, caches, first allocation
+
+        samples, items = [], 0
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            for _ in range(self.number):
+                items += self.func(state) or 1
+            samples.append((time.perf_counter() - started) / self.number)
+
+        per_call_items = items / (self.repeat * self.number)
+        result = {
+            "min_sec": min(samples),
+            "median_sec": statistics.median(samples),
+            "mean_sec": statistics.fmean(samples),
+            "stdev_sec": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+            "repeat": self.repeat,
+            "number": self.number,
+        }
+        if per_call_items != 1:
+            result[f"{self.unit}s_per_sec"] = per_call_items / result["median_sec"]
+        return result
+
+    def result_name(self, param):
+        return self.name if param is None else f"{self.name}[{param}]"
+
+
+def benchmark(name=None, setup=None, params=None, number=1, repeat=5, unit="op"):
+    """Register a benchmark function (see Benchmark for the arguments)."""
+    def decorator(func):
+        bench_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+        REGISTRY[bench_name] = Benchmark(bench_name, func, setup, params, number, repeat, unit)
+        return func
+    return decorator
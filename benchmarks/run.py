@@ -0,0 +1,146 @@
+"""
+Benchmark runner.
+
+    python -m benchmarks.run                    # all benchmarks
+    python -m benchmarks.run -k replay -k api   # only names containing "replay" or "api"
+    python -m benchmarks.run -k cold_start      # API process cold start (fresh interpreter)
+
+Benchmarks run in a throwaway copy of the project (data/, models/checkpoints/, logs/)
+so training and calibration never touch the real files, with the weather fixture and
+seeded simulation. Each run is appended to benchmarks/results/history.json together
+with the git commit, and compared against the previous run in that file.
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BENCH_DIR = PROJECT_ROOT / "benchmarks"
+DEFAULT_HISTORY = BENCH_DIR / "results" / "history.json"
+REGRESSION_RATIO = 1.2  # flag benchmarks whose best time got 20% slower
+
+# Left out of the sandbox: VCS data, notebooks, results, and the XGBoost forecaster
+# (benchmarks measure the simulated-state training path)
+SANDBOX_IGNORE = shutil.ignore_patterns(
+    ".git", "__pycache__", "notebooks", "raw_data", "results", "*.docx", "*.pkl", "*_ep*.pth"
+)
+
+
+# ---------- Worker (runs inside the sandbox) ----------
+def run_worker(filters, output_path):
+    from benchmarks.harness import REGISTRY
+
+    for path in sorted(BENCH_DIR.glob("bench_*.py")):
+        importlib.import_module(f"benchmarks.{path.stem}")
+
+    results = {}
+    for bench in REGISTRY.values():
+        for param in bench.params:
+            name = bench.result_name(param)
+            if filters and not any(f in name for f in filters):
+                continue
+            try:
+                results[name] = bench.run(param)
+            except Exception as e:
+                results[name] = {"error": repr(e)}
+            print(_format_line(name, results[name]), flush=True)
+
+    Path(output_path).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+def _format_line(name, result):
+    if "error" in result:
+        return f"❌ {name:<45} {result['error']}"
+    rate = next((f"{v:,.1f} {k.replace('_per_sec', '/s')}" for k, v in result.items() if k.endswith("_per_sec")), "")
+    return f"⏱️ {name:<45} {result['median_sec'] * 1000:>10.3f} ms  {rate}"
+
+
+# ---------- History ----------
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=PROJECT_ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path):
+    if not path.exists():
+        return []
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def compare(previous, current):
+    """
+    Print best-time ratios against the previous run (min over repeats is the least
+    noisy estimate on a shared machine); returns names that regressed.
+    """
+    regressions = []
+    label = (previous.get("commit") or "?")[:10]
+    print(f"\n📊 Compared with {label} ({previous.get('timestamp')})")
+    for name, result in current.items():
+        before = previous["results"].get(name)
+        if not before or "min_sec" not in before or "min_sec" not in result:
+            continue
+        ratio = result["min_sec"] / before["min_sec"]
+        flag = "⚠️ slower" if ratio > REGRESSION_RATIO else ("✅ faster" if ratio < 1 / REGRESSION_RATIO else "")
+        if ratio > REGRESSION_RATIO:
+            regressions.append(name)
+        print(f"   {name:<45} x{ratio:5.2f} {flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and record the results.")
+    parser.add_argument("-k", dest="filters", action="append", default=[],
+                        help="only run benchmarks whose name contains this (repeatable)")
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY, help="JSON history file")
+    parser.add_argument("--no-record", action="store_true", help="don't append this run to the history")
+    parser.add_argument("--worker", metavar="OUTPUT", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        return run_worker(args.filters, args.worker)
+
+    with tempfile.TemporaryDirectory(prefix="smarthome_bench_") as tmp:
+        sandbox = Path(tmp) / "project"
+        shutil.copytree(PROJECT_ROOT, sandbox, ignore=SANDBOX_IGNORE)
+        output = Path(tmp) / "results.json"
+        env = {**os.environ, "WEATHER_PROVIDER": "fixture", "PYTHONHASHSEED": "0"}
+        cmd = [sys.executable, "-m", "benchmarks.run", "--worker", str(output)]
+        for f in args.filters:
+            cmd += ["-k", f]
+        subprocess.run(cmd, cwd=sandbox, env=env, check=True)
+        results = json.loads(output.read_text(encoding="utf-8"))
+
+    history = load_history(args.history)
+    entry = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    if history:
+        compare(history[-1], results)
+    if not args.no_record:
+        args.history.parent.mkdir(parents=True, exist_ok=True)
+        history.append(entry)
+        args.history.write_text(json.dumps(history, indent=2), encoding="utf-8")
+        print(f"\n💾 Results appended to {args.history}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,90 @@
 import json
+from datetime import datetime
 from pathlib import Path
+from app_logging import get_logger
 from paths import DATA_DIR
 from impact_calibrator import ImpactCalibrator
+from persistence import DebouncedJsonWriter, atomic_write_json
+
+log = get_logger("devices")
 
 
 class DeviceManager:
     """Handles device catalog and keeps impact map synced."""
 
-    def __init__(self, catalog_path=None):
+    def __init__(self, catalog_path=None, flush_delay=0.5, lock=None):
         self.catalog_path = Path(catalog_path or DATA_DIR / "devices_catalog.json")
         self.catalog_path.parent.mkdir(parents=True, exist_ok=True)
         self.devices = {}
+        self._writer = DebouncedJsonWriter(self.catalog_path, lambda: self.devices, delay_sec=flush_delay, lock=lock)
         self.devices = self.load_devices()
 
     # ---------- JSON ----------
-    def load_devices(self):
-        """Load existing catalog safely without overwriting valid files."""
+    def load_devices(self, reload=False):
+        """
+        Load existing catalog safely without overwriting valid files.
+        reload=True (file changed on disk): a missing, empty or corrupt file keeps the
+        catalog in memory instead of emptying it, and is never marked as synced.
+        """
         if not self.catalog_path.exists():
-            print("⚠️ devices_catalog.json not found, creating a new one.")
-            self.save_devices({})
+            if reload:
+                log.error("device catalog disappeared, writing back the one in memory",
+                          extra={"path": str(self.catalog_path)})
+                self._writer.schedule()
+                return self.devices
+            log.warning("device catalog not found, creating a new one", extra={"path": str(self.catalog_path)})
+            atomic_write_json(self.catalog_path, {})
+            self._writer.mark_synced()
             return {}
 
+        # mtime before reading: a write that lands during the read triggers another reload
+        mtime = self._writer.file_mtime()
         try:
             with open(self.catalog_path, "r", encoding="utf-8") as f:
                 content = f.read().strip()
-                if not content:
-                    print("⚠️ devices_catalog.json is empty — please re-add your data manually.")
-                    return {}
-                return json.loads(content)
+            if not content:
+                if reload:
+                    log.error("device catalog is empty, keeping the one in memory",
+                              extra={"path": str(self.catalog_path)})
+                    return self.devices
+                log.warning("device catalog is empty, re-add devices manually", extra={"path": str(self.catalog_path)})
+                self._writer.mark_synced(mtime)
+                return {}
+            devices = json.loads(content)
         except json.JSONDecodeError as e:
-            print(f"⚠️ JSON error: {e}. Keeping existing file unchanged.")
+            backup = self.catalog_path.with_name(
+                f"{self.catalog_path.name}.corrupt-{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            )
+            self.catalog_path.replace(backup)
+            if reload:
+                log.error("device catalog corrupted, moved aside and writing back the one in memory",
+                          extra={"backup": str(backup), "error": str(e)})
+                self._writer.schedule()
+                return self.devices
+            log.error("device catalog corrupted, moved aside and starting a new one",
+                      extra={"backup": str(backup), "error": str(e)})
+            atomic_write_json(self.catalog_path, {})
+            self._writer.mark_synced()
             return {}
+        self._writer.mark_synced(mtime)
+        return devices
 
     def save_devices(self, data=None):
-        with open(self.catalog_path, "w", encoding="utf-8") as f:
-            json.dump(data or self.devices, f, indent=2, ensure_ascii=False)
+        if data:
+            atomic_write_json(self.catalog_path, data)
+            self._writer.mark_synced()
+        else:
+            self._writer.schedule()
+
+    def flush(self):
+        return self._writer.flush()
+
+    def reload_if_changed(self):
+        """Re-read the catalog only if the file changed on disk since we last touched it."""
+        return self._writer.reload_if_changed(self._reload)
+
+    def _reload(self):
+        self.devices = self.load_devices(reload=True)
 
     # ---------- Operations ----------
     def get_all_devices(self):
@@ -46,7 +96,7 @@ class DeviceManager:
             return {"error": f"{name} already exists."}
         self.devices[name] = {"base_kWh": base_kWh, "permissions": permissions or []}
         self.save_devices()
-        self._auto_recalibrate()
+        self._auto_recalibrate(permissions or [])
         return {"message": f"{name} added successfully."}
 
     def update_device(self, name, base_kWh=None, permissions=None):
@@ -58,7 +108,8 @@ class DeviceManager:
         if permissions is not None:
             self.devices[name]["permissions"] = permissions
         self.save_devices()
-        self._auto_recalibrate()
+        if permissions:
+            self._auto_recalibrate(permissions)
         return {"message": f"{name} updated successfully."}
 
     def remove_device(self, name):
@@ -66,8 +117,7 @@ class DeviceManager:
         if name not in self.devices:
             return {"error": f"{name} not found."}
         del self.devices[name]
-        self.save_devices()
-        self._auto_recalibrate()
+        self.save_devices()  # no new keywords → impact map unchanged
         return {"message": f"{name} deleted successfully."}
 
     # ---------- Permissions ----------
@@ -78,7 +128,7 @@ class DeviceManager:
         if permission not in self.devices[name]["permissions"]:
             self.devices[name]["permissions"].append(permission)
             self.save_devices()
-            self._auto_recalibrate()
+            self._auto_recalibrate([permission])
             return {"message": f"Permission '{permission}' added to {name}."}
         return {"warning": f"Permission '{permission}' already exists for {name}."}
 
@@ -88,17 +138,17 @@ class DeviceManager:
             return {"error": f"{name} not found."}
         if permission in self.devices[name]["permissions"]:
             self.devices[name]["permissions"].remove(permission)
-            self.save_devices()
-            self._auto_recalibrate()
+            self.save_devices()  # no new keywords → impact map unchanged
             return {"message": f"Permission '{permission}' removed from {name}."}
         return {"error": f"Permission '{permission}' not found in {name}."}
 
     # ---------- Helpers ----------
-    def _auto_recalibrate(self):
+    def _auto_recalibrate(self, permissions):
+        """Incrementally add impact factors for keywords of new/changed permissions only."""
         try:
-            print("🔄 Auto-recalibrating impact map...")
-            calibrator = ImpactCalibrator()
-            calibrator.calibrate()
-            print("✅ Impact map updated.")
+            # in-memory catalog: the file may still be waiting for its debounced write
+            calibrator = ImpactCalibrator(devices=self.devices)
+            calibrator.calibrate_permissions(permissions)
+            log.info("impact map recalibrated", extra={"permissions": list(permissions)})
         except Exception as e:
-            print(f"⚠️ Recalibration failed: {e}")
+            log.error("impact map recalibration failed", extra={"error": str(e)})
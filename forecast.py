@@ -0,0 +1,230 @@
+import pickle
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+import numpy as np
+
+from app_logging import get_logger
+from paths import MODELS_DIR
+
+log = get_logger("forecast")
+
+# Column order the multioutput XGBoost model was trained with (notebooks/training_xgboost.ipynb)
+FEATURE_COLS = (
+    "temperature_2m", "relative_humidity_2m",
+    "room_temperature", "room_humidity", "HVAC_temperature",
+    "hour", "is_weekend",
+    "energy_lag1", "energy_lag2", "energy_roll3", "room_temp_roll3",
+)
+# Output column order of every forecast model; predictors and LSTMPredictor.predict index by it
+TARGET_COLS = ("room_temperature", "synthetic_energy")
+FORECAST_SIZE = len(TARGET_COLS)  # values appended to the env state: [predicted_temp, predicted_kWh]
+
+# Not measured by the environment; typical values from the training data
+DEFAULT_FEATURES = {"relative_humidity_2m": 50.0, "room_humidity": 45.0}
+
+MODEL_CANDIDATES = (
+    MODELS_DIR / "multioutput_xgb_model.pkl",
+    MODELS_DIR / "forecast_lstm.pt",
+)
+
+
+# ---------- Features ----------
+class FeatureBuilder:
+    """
+    Turns environment observations into model feature rows, vectorized over envs and
+    hours. Every argument is a scalar or an array broadcastable to the batch shape.
+    Derived columns fall back to what the env can provide: HVAC setpoint and the 3-hour
+    indoor mean default to the current indoor temperature, energy lags to 0.
+    """
+
+    def __init__(self, feature_cols=FEATURE_COLS, defaults=None):
+        self.feature_cols = tuple(feature_cols)
+        self.defaults = {**DEFAULT_FEATURES, **(defaults or {})}
+
+    def build(self, room_temperature, temperature_2m, hour, is_weekend=0, **known):
+        """returns float32 array (..., len(feature_cols)) in feature_cols order"""
+        columns = {
+            **self.defaults,
+            "room_temperature": room_temperature,
+            "temperature_2m": temperature_2m,
+            "hour": hour,
+            "is_weekend": is_weekend,
+            "HVAC_temperature": room_temperature,
+            "room_temp_roll3": room_temperature,
+            "energy_lag1": 0.0,
+            "energy_lag2": 0.0,
+            "energy_roll3": 0.0,
+            **known,
+        }
+        missing = [c for c in self.feature_cols if c not in columns]
+        if missing:
+            raise ValueError(f"No value for forecast features {missing}")
+        arrays = np.broadcast_arrays(*(np.asarray(columns[c], dtype=np.float32) for c in self.feature_cols))
+        return np.stack(arrays, axis=-1)
+
+    def day(self, room_temperature, temperature_2m, start_hour=0, is_weekend=0, hours=24, **known):
+        """
+        Features for the next `hours` hours of N envs: (N, hours, F). Indoor state and
+        lags are held at their current values (persistence); hour and outdoor temp vary.
+        temperature_2m: (N,) constant per env, or (N, hours) hourly forecast.
+        """
+        room = np.asarray(room_temperature, dtype=np.float32).reshape(-1, 1)
+        outdoor = np.asarray(temperature_2m, dtype=np.float32)
+        outdoor = outdoor.reshape(-1, 1) if outdoor.ndim < 2 else outdoor
+        hour = (start_hour + np.arange(hours)) % 24
+        known = {k: np.asarray(v, dtype=np.float32).reshape(-1, 1) if np.ndim(v) else v for k, v in known.items()}
+        return self.build(room, outdoor, hour[None, :], np.asarray(is_weekend).reshape(-1, 1), **known)
+
+
+# ---------- Predictors ----------
+class Predictor(ABC):
+    """
+    Backend interface. predict_batch((N, F) float32) → (N, 2) float array with columns
+    in TARGET_COLS order: [room_temperature, synthetic_energy].
+    """
+
+    feature_cols = FEATURE_COLS
+
+    @abstractmethod
+    def predict_batch(self, features):
+        pass
+
+    def predict(self, features):
+        return self.predict_batch(np.asarray(features, dtype=np.float32).reshape(1, -1))[0]
+
+
+class XGBoostPredictor(Predictor):
+    """sklearn MultiOutputRegressor of XGBRegressors, pickled by notebooks/training_xgboost.ipynb."""
+
+    def __init__(self, model_path, feature_cols=None):
+        with open(model_path, "rb") as f:
+            self.model = pickle.load(f)  # needs xgboost + scikit-learn installed
+        self.feature_cols = tuple(feature_cols or load_feature_cols())
+
+    def predict_batch(self, features):
+        return np.asarray(self.model.predict(features), dtype=np.float32)
+
+
+class TorchPredictor(Predictor):
+    """
+    Torch forecast model (saved whole with torch.save) that maps (N, F) features to
+    outputs in TARGET_COLS order. torch is imported only when this backend is used.
+    """
+
+    def __init__(self, model_path, feature_cols=None, device="cpu"):
+        from lstm_predictor import LSTMPredictor
+
+        self.lstm = LSTMPredictor(model_path=model_path, device=device)
+        self.feature_cols = tuple(feature_cols or load_feature_cols())
+
+    def predict_batch(self, features):
+        # LSTMPredictor returns a view of its reused output buffer; the cache keeps rows
+        return np.array(self.lstm.predict_batch(features)[:, :FORECAST_SIZE])
+
+
+def load_feature_cols(path=MODELS_DIR / "feature_cols.pkl"):
+    """Feature order saved next to the model; FEATURE_COLS when there is none."""
+    if not path.exists():
+        return FEATURE_COLS
+    with open(path, "rb") as f:
+        return tuple(pickle.load(f))
+
+
+def load_predictor(model_path):
+    """Backend by file type: .pkl → XGBoost, .pt/.pth → torch."""
+    suffix = model_path.suffix.lower()
+    if suffix == ".pkl":
+        return XGBoostPredictor(model_path)
+    if suffix in (".pt", ".pth"):
+        return TorchPredictor(model_path)
+    raise ValueError(f"Unknown forecast model type: {model_path.name}")
+
+
+# ---------- Forecaster ----------
+class Forecaster:
+    """
+    Predictor + FeatureBuilder + LRU cache of predictions keyed by the (rounded)
+    feature tuple. A batch is answered from the cache where possible; the distinct
+    missing rows go to the model in a single predict_batch call.
+    """
+
+    def __init__(self, predictor, capacity=100_000, precision=1):
+        self.predictor = predictor
+        self.builder = FeatureBuilder(predictor.feature_cols)
+        self.capacity = capacity
+        self.precision = precision  # feature rounding, so nearby states share cache entries
+        self._cache = OrderedDict()  # feature tuple -> (2,) prediction
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def predict_batch(self, features):
+        """features: (..., F) → (..., 2) [predicted room temp, predicted kWh]"""
+        features = np.round(np.asarray(features, dtype=np.float32), self.precision)
+        rows = features.reshape(-1, features.shape[-1])
+        keys = list(map(tuple, rows.tolist()))
+        out = np.empty((len(keys), FORECAST_SIZE), dtype=np.float32)
+
+        with self._lock:
+            missing = {}
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    self._cache.move_to_end(key)
+                    out[i] = cached
+            self.hits += len(keys) - sum(map(len, missing.values()))
+            self.misses += len(missing)
+
+        if missing:
+            first_rows = [indices[0] for indices in missing.values()]
+            predicted = self.predictor.predict_batch(rows[first_rows])
+            with self._lock:
+                for (key, indices), value in zip(missing.items(), predicted):
+                    out[indices] = value
+                    self._cache[key] = value
+                while len(self._cache) > self.capacity:
+                    self._cache.popitem(last=False)
+        return out.reshape(*features.shape[:-1], FORECAST_SIZE)
+
+    def forecast_day(self, indoor_temp, outdoor_temp, start_hour=0, is_weekend=0, hours=24, **known):
+        """Next `hours` hours for N envs in one call: (N, hours, 2)."""
+        return self.predict_batch(
+            self.builder.day(indoor_temp, outdoor_temp, start_hour=start_hour, is_weekend=is_weekend,
+                             hours=hours, **known)
+        )
+
+    def stats(self):
+        with self._lock:
+            return {"cached": len(self._cache), "capacity": self.capacity, "hits": self.hits,
+                    "misses": self.misses}
+
+
+_forecaster = None
+_forecaster_loaded = False
+_forecaster_lock = threading.Lock()
+
+
+def get_forecaster():
+    """
+    Shared Forecaster for the first model in MODEL_CANDIDATES that loads, or None when
+    there is no model (or its backend isn't installed): callers then use the plain
+    simulated state.
+    """
+    global _forecaster, _forecaster_loaded
+    with _forecaster_lock:
+        if not _forecaster_loaded:
+            _forecaster_loaded = True
+            for path in MODEL_CANDIDATES:
+                if not path.exists():
+                    continue
+                try:
+                    _forecaster = Forecaster(load_predictor(path))
+                    log.info("forecast model loaded", extra={"path": str(path)})
+                    break
+                except (ImportError, OSError, pickle.UnpicklingError, RuntimeError, ValueError) as e:
+                    log.warning("forecast model not usable, skipping", extra={"path": str(path), "error": str(e)})
+        return _forecaster
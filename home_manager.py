@@ -1,44 +1,82 @@
 import json
+from datetime import datetime
 from pathlib import Path
+from app_logging import get_logger
 from device_manager import DeviceManager
 from paths import DATA_DIR
+from persistence import DebouncedJsonWriter
+
+log = get_logger("homes")
 
 
 class HomeManager:
-    def __init__(self, homes_path=DATA_DIR / "homes.json"):
+    def __init__(self, homes_path=DATA_DIR / "homes.json", device_manager=None, flush_delay=0.5, lock=None):
         self.homes_path = Path(homes_path)
         self.homes_path.parent.mkdir(parents=True, exist_ok=True)  # ✅ auto-create /data/
-        self.device_manager = DeviceManager()
+        self.device_manager = device_manager or DeviceManager()
         self.homes = {}
+        self._writer = DebouncedJsonWriter(self.homes_path, lambda: self.homes, delay_sec=flush_delay, lock=lock)
         self.homes = self._load_homes()
 
     # ---------- Load & Save ----------
-    def _load_homes(self):
+    def _load_homes(self, reload=False):
+        """
+        reload=True (file changed on disk): a missing, empty or corrupt file keeps the
+        last good homes in memory; only the first load starts a new empty structure.
+        """
         if self.homes_path.exists():
+            # mtime before reading: a write that lands during the read triggers another reload
+            mtime = self._writer.file_mtime()
             try:
                 with open(self.homes_path, "r", encoding="utf-8") as f:
                     content = f.read().strip()
-                    if content:
-                        return json.loads(content)
-                    else:
-                        print("⚠️ homes.json empty — initializing new structure.")
-                        self.homes = {}
-                        self._save_homes()
-                        return {}
-            except json.JSONDecodeError:
-                print("⚠️ homes.json corrupted — resetting file.")
+                if content:
+                    homes = json.loads(content)
+                    self._writer.mark_synced(mtime)
+                    return homes
+                if reload:
+                    log.error("homes file empty, keeping the homes in memory", extra={"path": str(self.homes_path)})
+                    return self.homes
+                log.warning("homes file empty, initializing a new structure", extra={"path": str(self.homes_path)})
                 self.homes = {}
                 self._save_homes()
                 return {}
+            except json.JSONDecodeError as e:
+                if reload:
+                    # possibly an external write still in progress: retry on the next transaction
+                    log.error("homes file unreadable, keeping the homes in memory",
+                              extra={"path": str(self.homes_path), "error": str(e)})
+                    return self.homes
+                backup = self.homes_path.with_name(
+                    f"{self.homes_path.name}.corrupt-{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                )
+                self.homes_path.replace(backup)
+                log.error("homes file corrupted, moved aside and starting a new one", extra={"backup": str(backup)})
+                self.homes = {}
+                self._save_homes()
+                return {}
+        elif reload:
+            log.error("homes file disappeared, writing back the homes in memory", extra={"path": str(self.homes_path)})
+            self._save_homes()
+            return self.homes
         else:
-            print("ℹ️ homes.json not found — creating a new one.")
+            log.info("homes file not found, creating a new one", extra={"path": str(self.homes_path)})
             self.homes = {}
             self._save_homes()
             return {}
 
     def _save_homes(self):
-        with open(self.homes_path, "w", encoding="utf-8") as f:
-            json.dump(self.homes, f, indent=2, ensure_ascii=False)
+        self._writer.schedule()
+
+    def flush(self):
+        return self._writer.flush()
+
+    def reload_if_changed(self):
+        """Re-read homes.json only if the file changed on disk since we last touched it."""
+        return self._writer.reload_if_changed(self._reload)
+
+    def _reload(self):
+        self.homes = self._load_homes(reload=True)
 
     # ---------- Home management ----------
     def add_home(self, home_name, comfort_range=(21, 25)):
@@ -119,6 +157,32 @@ class HomeManager:
             return {"message": f"Device '{device_name}' added to '{room_name}' in '{home_name}'."}
         return {"warning": f"Device '{device_name}' already in '{room_name}'."}
 
+    def assign_devices(self, home_name, room_name, device_names):
+        """Assign several catalog devices to a room with a single save."""
+        home_name, room_name = home_name.strip().title(), room_name.strip().title()
+
+        if home_name not in self.homes:
+            return {"error": f"Home '{home_name}' not found."}
+        if room_name not in self.homes[home_name]["rooms"]:
+            return {"error": f"Room '{room_name}' not found in '{home_name}'."}
+
+        catalog = self.device_manager.get_all_devices()
+        room_devices = self.homes[home_name]["rooms"][room_name]["devices"]
+        added, missing = [], []
+        for device_name in (d.strip().title() for d in device_names):
+            if device_name not in catalog:
+                missing.append(device_name)
+            elif device_name not in room_devices:
+                room_devices.append(device_name)
+                added.append(device_name)
+
+        if added:
+            self._save_homes()
+        result = {"message": f"{len(added)} device(s) added to '{room_name}' in '{home_name}'.", "added": added}
+        if missing:
+            result["missing"] = missing
+        return result
+
     def get_home_devices(self, home_name):
         home_name = home_name.strip().title()
         if home_name not in self.homes:
@@ -126,4 +190,5 @@ class HomeManager:
         all_devices = []
         for room in self.homes[home_name]["rooms"].values():
             all_devices.extend(room.get("devices", []))
-        return list(set(all_devices))
+        # de-duplicated in assignment order (a set would reorder the action space per process)
+        return list(dict.fromkeys(all_devices))
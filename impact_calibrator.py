@@ -1,86 +1,124 @@
 import random
 
-import pandas as pd
 import json
 from pathlib import Path
-import numpy as np
+from app_logging import get_logger
 from paths import DATA_DIR
+from persistence import atomic_write_json
+
+log = get_logger("impact")
 
 
 class ImpactCalibrator:
-    def __init__(self, catalog_path= DATA_DIR / "devices_catalog.json", output_path= DATA_DIR / "impact_map.json"):
+    def __init__(self, catalog_path= DATA_DIR / "devices_catalog.json", output_path= DATA_DIR / "impact_map.json",
+                 devices=None):
         self.catalog_path = Path(catalog_path)
         self.output_path = Path(output_path)
 
+        # in-memory catalog (e.g. from DeviceManager) takes precedence over the file
+        if devices is not None:
+            self.devices = devices
+            return
+
         if not self.catalog_path.exists():
             raise FileNotFoundError(f"Device catalog not found at {self.catalog_path}")
 
         with open(self.catalog_path, "r", encoding="utf-8") as f:
             self.devices = json.load(f)
 
-    def calibrate(self):
+    @staticmethod
+    def keywords_for(permissions):
+        """Split permissions into lower-case keywords ("set_low" → {"set", "low"})."""
+        keywords = set()
+        for perm in permissions:
+            # split by underscores or hyphens for better matching
+            keywords.update(p.lower() for p in perm.replace("-", "_").split("_") if p)
+        return keywords
+
+    def load_map(self):
+        if not self.output_path.exists():
+            return {}
+        try:
+            with open(self.output_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except json.JSONDecodeError as e:
+            log.warning("impact map unreadable, rebuilding", extra={"path": str(self.output_path), "error": str(e)})
+            return {}
+
+    def calibrate(self, incremental=True, seed=0):
         """
-        Automatically generates impact factors for every permission keyword
-        found in the current devices_catalog.json.
+        Generates impact factors for the permission keywords found in the device catalog.
+        incremental=True keeps every keyword already in impact_map.json and only adds
+        the missing ones, so unrelated catalog edits never change existing factors.
+        Each keyword draws from its own RNG seeded by (seed, keyword), so the same
+        keyword always gets the same factors.
         """
         # 🔍 Collect all unique permission keywords
-        keywords = set()
-        for device, info in self.devices.items():
-            for perm in info.get("permissions", []):
-                # split by underscores or hyphens for better matching
-                parts = [p for p in perm.replace("-", "_").split("_") if p]
-                keywords.update(parts)
-
-        # 🧮 Build energy/temperature impact map
-        impact_map = {}
-        for key in keywords:
-            key_lower = key.lower()
+        permissions = [p for info in self.devices.values() for p in info.get("permissions", [])]
+        keywords = self.keywords_for(permissions)
+        impact_map = self._extend(keywords, self.load_map() if incremental else {}, seed)
+        log.info("impact map calibrated", extra={"keywords": len(keywords)})
+        return impact_map
+
+    def calibrate_permissions(self, permissions, seed=0):
+        """Add factors for just these (new or changed) permissions; cost ∝ len(permissions)."""
+        return self._extend(self.keywords_for(permissions), self.load_map(), seed)
+
+    def _extend(self, keywords, impact_map, seed):
+        new_keys = sorted(k for k in keywords if k not in impact_map)
+        if not new_keys and self.output_path.exists():
+            return impact_map
+
+        for key in new_keys:
+            impact_map[key] = self._impact_for(key, random.Random(f"{seed}:{key}"))
+
+        # 💾 Save the new impact map (atomically: envs may be reading it)
+        atomic_write_json(self.output_path, impact_map)
+        if new_keys:
+            log.info("impact map keywords added", extra={"keywords": new_keys})
+        return impact_map
+
+    @staticmethod
+    def _impact_for(key_lower, rng):
+        """🧮 Energy/temperature impact of one keyword (simple heuristic on its meaning)."""
+        factor = 1.0
+        temp_change = 0.0
+
+        if "eco" in key_lower or "save" in key_lower:
+            factor = rng.uniform(0.6, 0.8)
+            temp_change = rng.uniform(-0.1, -0.05)
+        elif "low" in key_lower:
+            factor = rng.uniform(0.75, 0.9)
+            temp_change = rng.uniform(-0.3, -0.1)
+        elif "medium" in key_lower:
+            factor = rng.uniform(0.95, 1.05)
+            temp_change = rng.uniform(-0.1, 0.1)
+        elif "high" in key_lower:
+            factor = rng.uniform(1.1, 1.3)
+            temp_change = rng.uniform(0.1, 0.3)
+        elif "off" in key_lower:
+            factor = rng.uniform(0.02, 0.1)
+            temp_change = 0.0
+        elif "on" in key_lower:
             factor = 1.0
             temp_change = 0.0
+        elif "auto" in key_lower or "standard" in key_lower:
+            factor = 1.0
+            temp_change = 0.0
+        elif "charge" in key_lower:
+            factor = rng.uniform(1.2, 1.4)
+            temp_change = 0.0
+        elif "cool" in key_lower:
+            factor = rng.uniform(1.1, 1.3)
+            temp_change = rng.uniform(-0.3, -0.1)
+        elif "heat" in key_lower or "warm" in key_lower:
+            factor = rng.uniform(1.2, 1.5)
+            temp_change = rng.uniform(0.1, 0.4)
+        elif "dim" in key_lower:
+            factor = rng.uniform(0.7, 0.9)
+            temp_change = 0.0
 
-            # Simple heuristic based on keyword meaning
-            if "eco" in key_lower or "save" in key_lower:
-                factor = random.uniform(0.6, 0.8)
-                temp_change = random.uniform(-0.1, -0.05)
-            elif "low" in key_lower:
-                factor = random.uniform(0.75, 0.9)
-                temp_change = random.uniform(-0.3, -0.1)
-            elif "medium" in key_lower:
-                factor = random.uniform(0.95, 1.05)
-                temp_change = random.uniform(-0.1, 0.1)
-            elif "high" in key_lower:
-                factor = random.uniform(1.1, 1.3)
-                temp_change = random.uniform(0.1, 0.3)
-            elif "off" in key_lower:
-                factor = random.uniform(0.02, 0.1)
-                temp_change = 0.0
-            elif "on" in key_lower:
-                factor = 1.0
-                temp_change = 0.0
-            elif "auto" in key_lower or "standard" in key_lower:
-                factor = 1.0
-                temp_change = 0.0
-            elif "charge" in key_lower:
-                factor = random.uniform(1.2, 1.4)
-                temp_change = 0.0
-            elif "cool" in key_lower:
-                factor = random.uniform(1.1, 1.3)
-                temp_change = random.uniform(-0.3, -0.1)
-            elif "heat" in key_lower or "warm" in key_lower:
-                factor = random.uniform(1.2, 1.5)
-                temp_change = random.uniform(0.1, 0.4)
-            elif "dim" in key_lower:
-                factor = random.uniform(0.7, 0.9)
-                temp_change = 0.0
-
-            impact_map[key_lower] = {
-                "energy_factor": round(factor, 3),
-                "temp_change": round(temp_change, 3)
-            }
-
-        # 💾 Save the new impact map
-        with open(self.output_path, "w", encoding="utf-8") as f:
-            json.dump(impact_map, f, indent=2, ensure_ascii=False)
-
-        print(f"Impact map auto-generated from {len(keywords)} permission keywords.")
-        return impact_map
+        return {
+            "energy_factor": round(factor, 3),
+            "temp_change": round(temp_change, 3)
+        }
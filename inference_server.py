@@ -0,0 +1,142 @@
+import asyncio
+import time
+from collections import deque
+
+import numpy as np
+
+from metrics import INFERENCE_SECONDS
+
+
+class BatchedPolicyServer:
+    """
+    Gathers the pending states of every live home that asks for an action within a
+    short window and answers them with as few forward passes as possible:
+      - states for the same policy object are stacked into one batch,
+      - different policies with the same layer shapes are stacked further into
+        one batched matmul per layer (np.matmul over the policies).
+    Policies are rl.policy.NumpyPolicy; actions are greedy (live agents run with epsilon = 0).
+    """
+
+    def __init__(self, max_wait_ms=5.0, executor=None, history=1000):
+        self.max_wait_sec = max_wait_ms / 1000.0
+        self.executor = executor
+        self._pending = []  # (model, state, future, enqueued_at)
+        self._flush_handle = None
+
+        # metrics
+        self.requests = 0
+        self.batches = 0
+        self.forward_passes = 0
+        self._batch_sizes = deque(maxlen=history)
+        self._latencies_ms = deque(maxlen=history)
+        self._forward_ms = deque(maxlen=history)
+
+    async def infer(self, model, state):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((model, np.asarray(state, dtype=np.float32), future, time.perf_counter()))
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait_sec, self._schedule_flush, loop)
+        return await future
+
+    def _schedule_flush(self, loop):
+        self._flush_handle = None
+        pending, self._pending = self._pending, []
+        if pending:
+            loop.create_task(self._flush(loop, pending))
+
+    async def _flush(self, loop, pending):
+        try:
+            actions, forward_passes, forward_ms = await loop.run_in_executor(
+                self.executor, self._run_batch, pending
+            )
+        except Exception as e:
+            for _, _, future, _ in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        done_at = time.perf_counter()
+        for (_, _, future, enqueued_at), action in zip(pending, actions):
+            self._latencies_ms.append((done_at - enqueued_at) * 1000)
+            INFERENCE_SECONDS.observe(done_at - enqueued_at, path="batched")
+            if not future.done():
+                future.set_result(action)
+
+        self.requests += len(pending)
+        self.batches += 1
+        self.forward_passes += forward_passes
+        self._batch_sizes.append(len(pending))
+        self._forward_ms.append(forward_ms)
+
+    # ---------- Forward passes ----------
+    def _run_batch(self, pending):
+        started = time.perf_counter()
+
+        # 1. group states per model object
+        groups = {}
+        for i, (model, state, _, _) in enumerate(pending):
+            groups.setdefault(id(model), (model, []))[1].append(i)
+
+        # 2. bucket policies sharing the same layer shapes
+        buckets = {}
+        for model, indices in groups.values():
+            buckets.setdefault(model.signature, []).append((model, indices))
+
+        actions = [None] * len(pending)
+        states = [p[1] for p in pending]
+        for members in buckets.values():
+            if len(members) == 1:
+                model, indices = members[0]
+                for i, a in zip(indices, model.act_batch(np.stack([states[i] for i in indices])).tolist()):
+                    actions[i] = a
+            else:
+                q = self._stacked_forward(members, states)
+                for (_, indices), q_model in zip(members, q):
+                    for i, a in zip(indices, q_model[:len(indices)].argmax(axis=1).tolist()):
+                        actions[i] = a
+
+        return actions, len(buckets), (time.perf_counter() - started) * 1000
+
+    @staticmethod
+    def _stacked_forward(members, states):
+        """
+        One batched matmul per layer across G policies; each policy's states are padded
+        to the largest group. returns (G, max_states, n_actions)
+        """
+        width = max(len(indices) for _, indices in members)
+        x = np.zeros((len(members), width, members[0][0].state_size), dtype=np.float32)
+        for g, (_, indices) in enumerate(members):
+            x[g, :len(indices)] = [states[i] for i in indices]
+
+        last = len(members[0][0].layers) - 1
+        for depth in range(last + 1):
+            weight = np.stack([model.layers[depth][0] for model, _ in members])  # (G, in, out)
+            bias = np.stack([model.layers[depth][1] for model, _ in members])  # (G, out)
+            x = np.matmul(x, weight) + bias[:, None, :]
+            if depth < last:
+                np.maximum(x, 0.0, out=x)
+        return x
+
+    # ---------- Metrics ----------
+    def metrics(self):
+        def stats(values):
+            if not values:
+                return None
+            arr = np.asarray(values)
+            return {
+                "mean": round(float(arr.mean()), 3),
+                "p50": round(float(np.percentile(arr, 50)), 3),
+                "p95": round(float(np.percentile(arr, 95)), 3),
+                "max": round(float(arr.max()), 3),
+            }
+
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "forward_passes": self.forward_passes,
+            "avg_batch_size": round(self.requests / self.batches, 3) if self.batches else 0.0,
+            "batch_size": stats(self._batch_sizes),
+            "request_latency_ms": stats(self._latencies_ms),
+            "forward_ms": stats(self._forward_ms),
+        }
@@ -0,0 +1,120 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from kpi_store import get_kpi_store
+
+PLOT_MEDIA_TYPES = {"png": "image/png", "pdf": "application/pdf", "svg": "image/svg+xml"}
+PLOT_FORMATS = tuple(PLOT_MEDIA_TYPES)
+DEFAULT_MAX_POINTS = 2000  # buckets per series; a 100k-episode run plots 2000 mean points + a min/max band
+
+SERIES = (
+    ("reward", "Reward", "blue", "-"),
+    ("total_energy_kWh", "Energy (kWh)", "orange", "-"),
+    ("epsilon", "Epsilon", "green", "--"),
+)
+
+
+def draw_kpi_plot(ax, store, max_points=DEFAULT_MAX_POINTS):
+    """
+    Plot the reward / energy / epsilon history of a KPIStore onto `ax`. Long histories
+    are downsampled server-side: one mean line per bucket plus a shaded min–max band.
+    """
+    series = store.downsample([name for name, *_ in SERIES], max_points=max_points)
+    x = series["index"]
+    for name, label, color, style in SERIES:
+        ax.plot(x, series[name]["mean"], label=label, color=color, linestyle=style, linewidth=1.5)
+        if series["bucket_size"] > 1:
+            ax.fill_between(x, series[name]["min"], series[name]["max"], color=color, alpha=0.15, linewidth=0)
+
+    suffix = f" ({series['bucket_size']} episodes per point)" if series["bucket_size"] > 1 else ""
+    ax.set_title(f"Training KPIs - {store.dir.parent.name}{suffix}")
+    ax.set_xlabel("Episode (all runs)")
+    ax.set_ylabel("Value")
+    ax.legend()
+    ax.grid(True)
+
+
+def render_kpi_plot(store, path, fmt="png", max_points=DEFAULT_MAX_POINTS):
+    """
+    Write the KPI plot to `path`. Uses the Figure API on the Agg canvas (no pyplot
+    state), so it is safe off the main thread; matplotlib is imported only here.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(10, 5))
+    FigureCanvasAgg(fig)
+    draw_kpi_plot(fig.add_subplot(), store, max_points=max_points)
+    fig.tight_layout()
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    fig.savefig(tmp, format=fmt)
+    tmp.replace(path)
+    return path
+
+
+class KPIPlotRenderer:
+    """
+    Renders KPI plots on a background thread and caches the files under
+    logs/<Home>/plots/, keyed by the store version (row count + last write). An unchanged
+    history is never re-rendered; concurrent requests for the same artifact share one
+    render. Stale artifacts of the same format/size are removed after a new render.
+    """
+
+    def __init__(self, max_workers=1):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kpi-plot")
+        self._pending = {}  # cache path -> Future
+        self._lock = threading.RLock()  # a future finishing early runs _forget inside submit
+
+    @staticmethod
+    def artifact_path(store, fmt, max_points):
+        rows, mtime_ns = store.version()
+        return store.dir.parent / "plots" / f"kpi_{max_points}_{rows}_{mtime_ns}.{fmt}"
+
+    def submit(self, home_name, fmt="png", max_points=DEFAULT_MAX_POINTS):
+        """Future resolving to the artifact path (already resolved if it is cached)."""
+        if fmt not in PLOT_FORMATS:
+            raise ValueError(f"Unknown plot format {fmt!r}; expected one of {PLOT_FORMATS}")
+        store = get_kpi_store(home_name)
+        if len(store) == 0:
+            raise LookupError(f"No KPI data for {home_name!r}")
+        path = self.artifact_path(store, fmt, max_points)
+
+        with self._lock:
+            future = self._pending.get(path)
+            if future is None:
+                if path.exists():
+                    future = Future()
+                    future.set_result(path)
+                else:
+                    future = self._executor.submit(self._render, store, path, fmt, max_points)
+                    self._pending[path] = future
+                    future.add_done_callback(lambda _: self._forget(path))
+            return future
+
+    def _render(self, store, path, fmt, max_points):
+        render_kpi_plot(store, path, fmt=fmt, max_points=max_points)
+        for stale in path.parent.glob(f"kpi_{max_points}_*.{fmt}"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+        return path
+
+    def _forget(self, path):
+        with self._lock:
+            self._pending.pop(path, None)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_kpi_plot_renderer():
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = KPIPlotRenderer()
+        return _renderer
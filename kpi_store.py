@@ -0,0 +1,294 @@
+import csv
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import numpy as np
+
+from paths import LOGS_DIR
+
+# column name -> dtype; every column is a flat little-endian binary file read via np.memmap
+COLUMNS = {
+    "timestamp": "<f8",  # unix seconds
+    "run": "<i4",  # increments once per training run appending to the store
+    "episode": "<i4",
+    "reward": "<f8",
+    "total_energy_kWh": "<f8",
+    "avg_temp": "<f8",
+    "epsilon": "<f8",
+    "comfort_violation": "<f8",
+    "loss": "<f8",
+}
+AGGREGATED = ("reward", "total_energy_kWh", "avg_temp", "comfort_violation")
+
+
+def home_dir_name(home_name):
+    return home_name.strip().title().replace(" ", "_")
+
+
+class KPIStore:
+    """
+    Per-home training KPI history, stored column by column under
+    logs/<Home>/kpis/<column>.bin. Appending a row is one small write per column;
+    reads memory-map the columns, so range queries and downsampling never parse text.
+    Running aggregates (count, sums, last values) are folded forward incrementally:
+    summary() only looks at rows appended since the previous call, which makes it
+    O(1) per request even when another process (a training worker) is writing.
+    Writers (a training job and the live loop may share a home) hold a per-home file
+    lock for a whole row; a row torn by a crash is truncated away on the next open.
+    """
+
+    def __init__(self, home_name, log_dir=LOGS_DIR):
+        self.home_name = home_name
+        self.dir = log_dir / home_dir_name(home_name) / "kpis"
+        self._files = {}  # column -> unbuffered append handle (writer side)
+        self._lock = threading.Lock()
+        self._agg = {"count": 0, "sums": dict.fromkeys(AGGREGATED, 0.0), "runs": 0}
+        self._last = None
+        if self.dir.exists() or self._legacy_csv().exists():
+            with self._file_lock():
+                self._repair()
+                self._maybe_import_csv()
+
+    def _path(self, column):
+        return self.dir / f"{column}.bin"
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive per-home lock (kpis/.lock) across threads and processes."""
+        with self._lock:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            with open(self.dir / ".lock", "a+b") as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+                    else:
+                        f.seek(0)
+                        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _repair(self):
+        """Truncate every column to the shortest one (drops a row torn by a crash). Call under _file_lock."""
+        n = len(self)
+        for column, dtype in COLUMNS.items():
+            path = self._path(column)
+            if path.exists() and path.stat().st_size != n * np.dtype(dtype).itemsize:
+                os.truncate(path, n * np.dtype(dtype).itemsize)
+
+    # ---------- Writing ----------
+    def next_run(self):
+        """Run id for a new training run (one past the last stored one)."""
+        last = self.tail(1)
+        return int(last["run"][0]) + 1 if len(last["run"]) else 1
+
+    def append(self, row):
+        """row: dict with every COLUMNS key (timestamp as unix seconds)."""
+        with self._file_lock():
+            self._write_row(row)
+
+    def _write_row(self, row):
+        # under _file_lock: every column of the row is written before another writer starts
+        if not self._files:
+            self._repair()
+            self._files = {c: open(self._path(c), "ab", buffering=0) for c in COLUMNS}
+        # a reader racing this loop sees columns of unequal length; len() takes the shortest
+        for column, dtype in COLUMNS.items():
+            self._files[column].write(np.array(row[column], dtype=dtype).tobytes())
+
+    def close(self):
+        with self._lock:
+            for f in self._files.values():
+                f.close()
+            self._files = {}
+
+    # ---------- Reading ----------
+    def __len__(self):
+        sizes = [
+            self._path(c).stat().st_size // np.dtype(dtype).itemsize if self._path(c).exists() else 0
+            for c, dtype in COLUMNS.items()
+        ]
+        return min(sizes)
+
+    def _column(self, column, n):
+        if n == 0:
+            return np.empty(0, dtype=COLUMNS[column])
+        return np.memmap(self._path(column), dtype=COLUMNS[column], mode="r", shape=(n,))
+
+    def columns(self, names=None, start=0, stop=None):
+        """Row slice [start:stop) of the requested columns as arrays."""
+        n = len(self)
+        stop = n if stop is None else min(stop, n)
+        start = max(0, min(start, stop))
+        return {c: np.array(self._column(c, n)[start:stop]) for c in (names or COLUMNS)}
+
+    def tail(self, n=10, names=None):
+        total = len(self)
+        return self.columns(names, start=max(0, total - n))
+
+    def query(self, start_episode=None, end_episode=None, since=None, until=None, run=None, names=None,
+              limit=None):
+        """
+        Rows filtered by episode range, timestamp range (unix seconds or ISO strings)
+        and/or run id. Timestamps are append-ordered, so the time range is a binary
+        search; the remaining filters are vectorized masks.
+        """
+        n = len(self)
+        timestamps = self._column("timestamp", n)
+        lo = int(np.searchsorted(timestamps, _to_unix(since), side="left")) if since is not None else 0
+        hi = int(np.searchsorted(timestamps, _to_unix(until), side="right")) if until is not None else n
+
+        mask = np.ones(hi - lo, dtype=bool)
+        if start_episode is not None or end_episode is not None or run is not None:
+            if start_episode is not None or end_episode is not None:
+                episodes = self._column("episode", n)[lo:hi]
+                if start_episode is not None:
+                    mask &= episodes >= start_episode
+                if end_episode is not None:
+                    mask &= episodes <= end_episode
+            if run is not None:
+                mask &= self._column("run", n)[lo:hi] == run
+        rows = np.flatnonzero(mask) + lo
+        if limit is not None:
+            rows = rows[-limit:]
+        return {c: np.asarray(self._column(c, n)[rows]) for c in (names or COLUMNS)}
+
+    def downsample(self, names=("reward", "total_energy_kWh", "epsilon"), max_points=500, start=0, stop=None):
+        """
+        Chart series with at most max_points buckets: per bucket the first row index
+        and the mean (plus min/max) of each column. Rows are bucketed in storage order.
+        """
+        cols = self.columns(list(names), start=start, stop=stop)
+        n = len(next(iter(cols.values()))) if cols else 0
+        if n == 0:
+            return {"index": [], "bucket_size": 1, **{c: {"mean": [], "min": [], "max": []} for c in names}}
+        bucket_size = max(1, -(-n // max_points))
+        edges = np.arange(0, n, bucket_size)
+        counts = np.diff(np.append(edges, n))
+        series = {"index": (edges + start).tolist(), "bucket_size": int(bucket_size)}
+        for c, values in cols.items():
+            values = values.astype(np.float64)
+            series[c] = {
+                "mean": (np.add.reduceat(values, edges) / counts).tolist(),
+                "min": np.minimum.reduceat(values, edges).tolist(),
+                "max": np.maximum.reduceat(values, edges).tolist(),
+            }
+        return series
+
+    def version(self):
+        """Changes whenever rows are appended (row count + last write time)."""
+        path = self._path("episode")
+        return (len(self), path.stat().st_mtime_ns if path.exists() else 0)
+
+    # ---------- Aggregates ----------
+    def summary(self):
+        """Running aggregates, updated with just the rows appended since the last call."""
+        with self._lock:
+            n = len(self)
+            seen = self._agg["count"]
+            if n < seen:  # store was truncated/replaced → start over
+                self._agg = {"count": 0, "sums": dict.fromkeys(AGGREGATED, 0.0), "runs": 0}
+                self._last = None
+                seen = 0
+            if n > seen:
+                new = self.columns(list(COLUMNS), start=seen, stop=n)
+                for c in AGGREGATED:
+                    self._agg["sums"][c] += float(new[c].sum())
+                self._agg["count"] = n
+                self._agg["runs"] = int(new["run"][-1])
+                self._last = {c: new[c][-1].item() for c in COLUMNS}
+
+            count = self._agg["count"]
+            if count == 0:
+                return None
+            means = {c: self._agg["sums"][c] / count for c in AGGREGATED}
+            return {
+                "episodes": count,
+                "runs": self._agg["runs"],
+                "avg_reward": means["reward"],
+                "avg_energy_kWh": means["total_energy_kWh"],
+                "avg_temp": means["avg_temp"],
+                "avg_comfort_violation": means["comfort_violation"],
+                "final_epsilon": self._last["epsilon"],
+                "last_episode": int(self._last["episode"]),
+                "last_update": datetime.fromtimestamp(self._last["timestamp"]).isoformat(),
+            }
+
+    # ---------- Migration ----------
+    def _legacy_csv(self):
+        return self.dir.parent / "training_kpis.csv"
+
+    def _maybe_import_csv(self):
+        """
+        One-time import of the legacy logs/<Home>/training_kpis.csv into an empty store.
+        Runs under _file_lock; kpis/.csv_imported marks it done for every later open.
+        """
+        csv_path = self._legacy_csv()
+        marker = self.dir / ".csv_imported"
+        if not csv_path.exists() or marker.exists():
+            return
+        if len(self) == 0:
+            with open(csv_path, newline="", encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))
+            run = 0
+            previous_episode = None
+            for r in rows:
+                episode = int(r["episode"])
+                if previous_episode is None or episode <= previous_episode:
+                    run += 1
+                previous_episode = episode
+                self._write_row({
+                    "timestamp": _to_unix(r["timestamp"]),
+                    "run": run,
+                    "episode": episode,
+                    **{c: float(r.get(c) or 0.0) for c in ("reward", "total_energy_kWh", "avg_temp", "epsilon",
+                                                           "comfort_violation", "loss")},
+                })
+            for f in self._files.values():
+                f.close()
+            self._files = {}
+        marker.write_text(datetime.now().isoformat(), encoding="utf-8")
+
+
+def _to_unix(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(str(value)).timestamp()
+
+
+def records(columns):
+    """Column arrays → list of row dicts (JSON-ready, ISO timestamps)."""
+    names = list(columns)
+    out = []
+    for values in zip(*(columns[c].tolist() for c in names)):
+        row = dict(zip(names, values))
+        if "timestamp" in row:
+            row["timestamp"] = datetime.fromtimestamp(row["timestamp"]).isoformat(timespec="seconds")
+        out.append(row)
+    return out
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_kpi_store(home_name):
+    """Shared reader per home, so running aggregates persist across requests."""
+    key = home_dir_name(home_name)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = KPIStore(home_name)
+        return store
@@ -0,0 +1,63 @@
+import asyncio
+import json
+import threading
+
+
+class LiveEventBus:
+    """
+    In-process pub/sub for live optimizer steps, one topic per home.
+    publish() is thread-safe (the optimizer runs outside the event loop); each
+    subscriber owns a bounded asyncio.Queue, and a slow subscriber loses its
+    oldest events instead of holding back the publisher.
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = {}  # home -> {queue: loop}
+        self._lock = threading.Lock()
+
+    def subscribe(self, home):
+        """Must be called from the event loop that will consume the queue."""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._subscribers.setdefault(home, {})[queue] = loop
+        return queue
+
+    def unsubscribe(self, home, queue):
+        with self._lock:
+            subscribers = self._subscribers.get(home, {})
+            subscribers.pop(queue, None)
+            if not subscribers:
+                self._subscribers.pop(home, None)
+
+    def subscriber_count(self, home=None):
+        with self._lock:
+            if home is not None:
+                return len(self._subscribers.get(home, {}))
+            return sum(len(s) for s in self._subscribers.values())
+
+    def publish(self, home, record):
+        with self._lock:
+            targets = list(self._subscribers.get(home, {}).items())
+        for queue, loop in targets:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, record)
+            except RuntimeError:
+                # loop already closed → subscriber is gone
+                self.unsubscribe(home, queue)
+
+    @staticmethod
+    def _offer(queue, record):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(record)
+
+
+live_events = LiveEventBus()
+
+
+def format_sse(data, event=None):
+    """Encode one Server-Sent Events message."""
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
@@ -0,0 +1,176 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from model_registry import home_slug
+from paths import LOGS_DIR
+
+
+class LiveLog:
+    """
+    Per-home live optimizer log: a bounded in-memory window for the dashboard plus an
+    append-only JSON Lines file for the full history. Each append is O(1); the file
+    rotates to <name>.jsonl.1 … .N once it exceeds max_bytes or max_age_sec.
+    A legacy <name>.json snapshot is imported into the new file once, and the window
+    starts from the tail of the file so history survives a restart.
+    """
+
+    def __init__(self, home_name, window=50, max_bytes=10 * 1024 * 1024, max_age_sec=24 * 3600,
+                 backups=5, log_dir=LOGS_DIR):
+        self.home_name = home_name
+        self.path = log_dir / home_name / f"{home_slug(home_name)}_live_log.jsonl"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age_sec = max_age_sec
+        self.backups = backups
+
+        self.window = deque(maxlen=window)
+        self.total_reward = 0.0
+        self.total_energy = 0.0
+        self.last_update = None
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._opened_at = None
+        if not self.path.exists():
+            self._import_legacy(legacy_path(home_name, log_dir))
+        for record in self.read_tail(self.path, window):
+            self._remember(record)
+        self._open()
+
+    def _import_legacy(self, legacy):
+        steps = read_legacy(legacy)
+        if not steps:
+            return
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in steps)
+
+    def _open(self):
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._opened_at = time.time()
+
+    def _should_rotate(self):
+        return (
+            self._file.tell() >= self.max_bytes
+            or time.time() - self._opened_at >= self.max_age_sec
+        )
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backups - 1, 0, -1):
+            src = self.path.with_name(f"{self.path.name}.{i}")
+            if src.exists():
+                os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+        if self.backups > 0:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+        self._open()
+
+    def _remember(self, record):
+        self.window.append(record)
+        self.total_reward = record.get("total_reward", self.total_reward)
+        self.total_energy = record.get("total_energy", self.total_energy)
+        self.last_update = record.get("timestamp", datetime.now().isoformat())
+
+    def append(self, record):
+        with self._lock:
+            self._remember(record)
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+            if self._should_rotate():
+                self._rotate()
+
+    def snapshot(self):
+        """Dashboard view: totals plus the last `window` steps."""
+        with self._lock:
+            return {
+                "home": self.home_name,
+                "last_update": self.last_update,
+                "total_reward": self.total_reward,
+                "total_energy": self.total_energy,
+                "steps": list(self.window),
+            }
+
+    def close(self):
+        with self._lock:
+            if self._file and not self._file.closed:
+                self._file.close()
+
+    @staticmethod
+    def read_tail(path, n=50, chunk_size=8192):
+        """Last n records of a JSON Lines file, reading backwards from the end."""
+        if not path.exists():
+            return []
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            end = f.tell()
+            data = b""
+            while end > 0 and data.count(b"\n") <= n:
+                start = max(0, end - chunk_size)
+                f.seek(start)
+                data = f.read(end - start) + data
+                end = start
+        lines = [line for line in data.splitlines() if line.strip()][-n:]
+        return [json.loads(line) for line in lines]
+
+
+def legacy_path(home_name, log_dir=LOGS_DIR):
+    """Whole-history JSON snapshot written by the live agent before the JSONL log."""
+    return log_dir / home_name / f"{home_slug(home_name)}_live_log.json"
+
+
+def read_legacy(path):
+    """Steps of a legacy JSON snapshot ({"steps": [...], ...}); [] if missing or unreadable."""
+    if not path.exists():
+        return []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("steps", [])
+    except (json.JSONDecodeError, AttributeError):
+        return []
+
+
+_live_logs = {}
+_live_logs_lock = threading.Lock()
+
+
+def open_live_log(home_name, **kwargs):
+    """Create (or replace) the live log of a home and register it for in-process readers."""
+    with _live_logs_lock:
+        old = _live_logs.get(home_name)
+        if old is not None:
+            old.close()
+        log = _live_logs[home_name] = LiveLog(home_name, **kwargs)
+        return log
+
+
+def get_live_log(home_name):
+    return _live_logs.get(home_name)
+
+
+def live_snapshot(home_name, window=50):
+    """
+    In-memory window if the optimizer runs in this process, otherwise the tail of its file
+    (or of the legacy JSON snapshot when there is no JSONL file yet).
+    """
+    log = get_live_log(home_name)
+    if log is not None:
+        return log.snapshot()
+
+    path = LOGS_DIR / home_name / f"{home_slug(home_name)}_live_log.jsonl"
+    # a home whose optimizer hasn't run since the JSONL log was introduced
+    steps = LiveLog.read_tail(path, window) if path.exists() else read_legacy(legacy_path(home_name))[-window:]
+    if not steps:
+        return None
+    last = steps[-1]
+    return {
+        "home": home_name,
+        "last_update": last.get("timestamp"),
+        "total_reward": last.get("total_reward"),
+        "total_energy": last.get("total_energy"),
+        "steps": steps,
+    }
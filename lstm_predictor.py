@@ -1,31 +1,109 @@
+import threading
+
 import torch
 import numpy as np
 
+from app_logging import get_logger
+from forecast import TARGET_COLS
+
+log = get_logger("forecast")
+
+# output columns of the forecast model, in TARGET_COLS order (shared with forecast.TorchPredictor)
+_TEMP = TARGET_COLS.index("room_temperature")
+_KWH = TARGET_COLS.index("synthetic_energy")
+
 
 class LSTMPredictor:
+    """
+    Wraps a torch forecast model (whole nn.Module saved with torch.save).
+
+    predict_batch() is the fast path: (N, F) NumPy in, (N, outputs) NumPy out, with the
+    host-side input/output buffers allocated once and reused (pinned when the model
+    runs on a GPU). Sequence models (any nn.LSTM/GRU/RNN inside, forward(x, hidden)
+    → (y, hidden)) get each row as one time step; with stateful=True the hidden state
+    is carried from one call to the next, so N streams (homes, vectorized envs) can be
+    fed one step at a time.
+    """
+
     def __init__(self, model_path=None, device="cpu"):
         self.model_path = model_path
         self.device = device
         self.model = None
+        self.is_sequence = False
+        self._lock = threading.Lock()
+        self._in = None  # torch (capacity, F) host buffer
+        self._out = None  # NumPy (capacity, outputs) buffer; self._out_t shares its memory
+        self._out_t = None
+        self._hidden = None  # carried hidden state in stateful mode
         if model_path:
             self.load_model(model_path)
 
     def load_model(self, path):
-        self.model = torch.load(path, map_location=self.device)
+        # whole nn.Module pickled with torch.save (local, trusted file)
+        self.model = torch.load(path, map_location=self.device, weights_only=False)
         self.model.eval()
-        print(f"✅ LSTM model loaded from: {path}")
+        self.is_sequence = any(isinstance(m, torch.nn.RNNBase) for m in self.model.modules())
+        self._in = self._out = self._out_t = self._hidden = None
+        log.info("LSTM model loaded", extra={"path": str(path)})
 
-    def predict(self, features):
+    def _ensure_buffers(self, n, n_features):
+        if self._in is None or self._in.shape[0] < n or self._in.shape[1] != n_features:
+            capacity = max(n, 2 * self._in.shape[0] if self._in is not None else 64)
+            pin = torch.cuda.is_available() and torch.device(self.device).type == "cuda"
+            self._in = torch.empty((capacity, n_features), dtype=torch.float32, pin_memory=pin)
+            self._out = self._out_t = None  # reallocated at the model's output width
+
+    def _forward(self, x, stateful):
+        if not self.is_sequence:
+            return self.model(x)
+        hidden = self._hidden if stateful else None
+        result = self.model(x.unsqueeze(1), hidden)  # (N, 1, F): one time step per stream
+        y, hidden = result if isinstance(result, tuple) else (result, None)
+        if stateful:
+            self._hidden = hidden
+        return y[:, -1] if y.dim() == 3 else y
+
+    def predict_batch(self, features, stateful=False):
         """
-        features: list or np.array → [outdoor_temp, hour, season, device_usage...]
-        returns (predicted_kWh, predicted_indoor_temp)
+        features: (N, F) array-like → (N, outputs) float32 NumPy array.
+        The result is a view into a reused buffer, valid until the next call; copy it
+        to keep it. stateful=True (sequence models): continue each of the N streams
+        from the previous call's hidden state (see reset_state).
         """
         if self.model is None:
             raise RuntimeError("⚠️ LSTM model not loaded yet.")
+        features = np.ascontiguousarray(features, dtype=np.float32)
+        n, n_features = features.shape
+
+        with self._lock, torch.inference_mode():
+            self._ensure_buffers(n, n_features)
+            self._in[:n].copy_(torch.from_numpy(features))
+            x = self._in[:n].to(self.device, non_blocking=True)
+            if stateful and self._hidden is not None and _batch_size(self._hidden) != n:
+                self._hidden = None  # number of streams changed
+            y = self._forward(x, stateful)
+
+            if self._out is None or self._out.shape[0] < self._in.shape[0] or self._out.shape[1] != y.shape[1]:
+                self._out = np.empty((self._in.shape[0], y.shape[1]), dtype=np.float32)
+                self._out_t = torch.from_numpy(self._out)
+            self._out_t[:n].copy_(y)
+            return self._out[:n]
 
-        x = torch.tensor(features, dtype=torch.float32).unsqueeze(0).to(self.device)
-        with torch.no_grad():
-            y = self.model(x).cpu().numpy().flatten()
+    def reset_state(self):
+        """Forget the carried hidden state (start of a new episode/day)."""
+        with self._lock:
+            self._hidden = None
 
-        predicted_kWh, predicted_temp = y[0], y[1]
+    def predict(self, features):
+        """
+        features: list or np.array → [outdoor_temp, hour, season, device_usage...]
+        returns (predicted_kWh, predicted_indoor_temp); the model outputs are read in TARGET_COLS order
+        """
+        y = self.predict_batch(np.asarray(features, dtype=np.float32).reshape(1, -1))[0]
+        predicted_kWh, predicted_temp = y[_KWH], y[_TEMP]
         return float(predicted_kWh), float(predicted_temp)
+
+
+def _batch_size(hidden):
+    # LSTM: (h, c) each (layers, N, H); GRU/RNN: (layers, N, H)
+    return (hidden[0] if isinstance(hidden, tuple) else hidden).shape[1]
@@ -1,51 +1,66 @@
-import json
 import time
 import numpy as np
 
-from paths import MODELS_DIR, LOGS_DIR
-from rl.rl_agent import RLAgent
+from app_logging import get_logger
+from forecast import get_forecaster
+from live_events import live_events
+from live_log import open_live_log
+from metrics import INFERENCE_SECONDS
+from model_registry import get_model_registry
 from datetime import datetime
 
 from rl.rl_environment import SmartHomeEnv
 
+log = get_logger("live")
 
-def run_live_agent(home_name="Default", interval_sec=60, continuous=True):
+
+class LiveController:
     """
-    Run the RL agent in real time (continuous loop) and log each step for dashboard display.
+    State of one home's live control loop (env, policy, running totals, live log).
+    step() performs one control tick; the caller decides when ticks happen.
     """
-    print(f"\n=== 🏡 STARTING LIVE AGENT FOR: {home_name} ===")
-    env = SmartHomeEnv(home_name=home_name)
-
-    model_path = MODELS_DIR / f"checkpoints/{home_name.lower().replace(' ', '_')}_final.pth"
-    agent = RLAgent(state_size=env.state_size, action_size=len(env.action_space))
-
-    if model_path.exists():
-        agent.load_model(model_path)
-        print(f"✅ Loaded trained model for {home_name}")
-    else:
-        print(f"⚠️ No trained model found → starting with random policy")
 
-    agent.epsilon = 0.0
-    state = env.reset()
-
-    step = 0
-    total_reward = 0
-    total_energy = 0
-    history = []
-
-    log_path = LOGS_DIR / home_name / f"{home_name.lower().replace(' ', '_')}_live_log.json"
-    log_path.parent.mkdir(parents=True, exist_ok=True)
-
-    while True:
-        step += 1
+    def __init__(self, home_name="Default"):
+        self.home_name = home_name
+        # same state layout as training: forecast-augmented when a forecast model is available
+        self.env = SmartHomeEnv(home_name=home_name, forecaster=get_forecaster())
+
+        registry = get_model_registry()
+        self.model_path = registry.checkpoint_path(home_name)
+        # inference-only NumPy policy from the shared registry cache; no torch on the live path
+        self.policy, self.model_info = registry.get(
+            home_name, self.env.state_size, len(self.env.action_space)
+        )
+        if self.model_info["trained"]:
+            log.info("live agent started", extra={"home": home_name, "model": self.model_path.name})
+        else:
+            log.warning("no trained model, live agent starts with a random policy", extra={"home": home_name})
+
+        self.state = self.env.reset()
+
+        self.step_count = 0
+        self.total_reward = 0
+        self.total_energy = 0
+        # bounded window for the dashboard + append-only JSONL history on disk
+        self.live_log = open_live_log(home_name)
+
+    def decide(self, state):
+        with INFERENCE_SECONDS.time(path="direct"):
+            return self.policy.act(state)
+
+    def step(self):
+        return self.apply(self.decide(self.state))
+
+    def apply(self, action_idx):
+        """Execute an action, log and publish the resulting record."""
+        env = self.env
+        self.step_count += 1
         now = datetime.now()
-        print(f"\n⏱️ [{now.strftime('%H:%M:%S')}] STEP {step}")
 
-        action_idx = agent.act(state)
         next_state, reward, done, info = env.step(action_idx)
 
-        total_reward += reward
-        total_energy += info["energy_used"]
+        self.total_reward += reward
+        self.total_energy += info["energy_used"]
 
         # === Calculate comfort violation ===
         comfort_violation = 0.0
@@ -55,42 +70,45 @@ def run_live_agent(home_name="Default", interval_sec=60, continuous=True):
         # === Structure full record ===
         record = {
             "timestamp": now.isoformat(),
-            "home": home_name,
-            "step": step,
+            "home": self.home_name,
+            "step": self.step_count,
             "device": info["device"],
             "action": info["action"],
             "indoor_temp": round(info["indoor_temp"], 2),
             "outdoor_temp": round(env.outdoor_temp, 2),
             "energy_used": round(info["energy_used"], 3),
-            "total_energy": round(total_energy, 3),
+            "total_energy": round(self.total_energy, 3),
             "reward": round(reward, 3),
-            "total_reward": round(total_reward, 3),
+            "total_reward": round(self.total_reward, 3),
             "comfort_range": [env.comfort_min, env.comfort_max],
             "comfort_violation": round(comfort_violation, 3),
-            "model": model_path.name if model_path.exists() else "untrained"
+            "model": self.model_path.name if self.model_info["trained"] else "untrained"
         }
 
-        history.append(record)
-
-        # === Print nicely ===
-        print(f" → Action: {info['device']} / {info['action']}")
-        print(f" → Indoor: {info['indoor_temp']:.2f}°C | Outdoor: {env.outdoor_temp:.2f}°C")
-        print(f" → Energy: {info['energy_used']:.3f} kWh | Reward: {reward:.3f}")
-        print(f" → Total Energy Used: {total_energy:.3f} kWh")
-
-        # === Save JSON snapshot for dashboard ===
-        with open(log_path, "w", encoding="utf-8") as f:
-            json.dump({
-                "home": home_name,
-                "last_update": now.isoformat(),
-                "total_reward": total_reward,
-                "total_energy": total_energy,
-                "steps": history[-50:]  # keep last 50 steps
-            }, f, indent=2)
-
-        # Wait and update state
-        time.sleep(interval_sec)
-        state = next_state
-
-        if not continuous and step >= 24:
-            break
+        self.live_log.append(record)
+        live_events.publish(self.home_name, record)  # push to connected dashboards
+
+        log.debug("live step", extra=record)  # the record is already built for the log/dashboard
+
+        self.state = next_state
+        return record
+
+    def close(self):
+        self.live_log.close()
+
+
+def run_live_agent(home_name="Default", interval_sec=60, continuous=True):
+    """
+    Run the RL agent in real time (continuous loop) and log each step for dashboard display.
+    Blocking, one home per call; the API uses OptimizerScheduler to run many homes instead.
+    """
+    controller = LiveController(home_name)
+    try:
+        while True:
+            controller.step()
+            if not continuous and controller.step_count >= 24:
+                break
+            # Wait for the next control tick
+            time.sleep(interval_sec)
+    finally:
+        controller.close()
@@ -0,0 +1,225 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; covers a ~10 µs env step up to multi-second HTTP/weather calls
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}  # label values tuple -> value (float, or [bucket counts, sum, count])
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def snapshot(self):
+        with self._lock:
+            return {key: self._copy(value) for key, value in self._values.items()}
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def merge(self, snapshot):
+        with self._lock:
+            for key, value in snapshot.items():
+                self._values[key] = self._values.get(key, 0.0) + value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def merge(self, snapshot):
+        with self._lock:
+            self._values.update(snapshot)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    @staticmethod
+    def _copy(value):
+        return [list(value[0]), value[1], value[2]]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def merge(self, snapshot):
+        with self._lock:
+            for key, (counts, total, count) in snapshot.items():
+                entry = self._values.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0, 0])
+                entry[0] = [a + b for a, b in zip(entry[0], counts)]
+                entry[1] += total
+                entry[2] += count
+
+
+class MetricsRegistry:
+    """
+    Process-local counters, gauges and histograms rendered in the Prometheus text
+    format. Training workers run in other processes: they ship snapshot() through
+    their job progress and the API process merges or overlays them at render time.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, help_text, labels, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, labels, **kwargs)
+            return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._get_or_create(Counter, name, help_text, labels)
+
+    def gauge(self, name, help_text, labels=()):
+        return self._get_or_create(Gauge, name, help_text, labels)
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self._get_or_create(Histogram, name, help_text, labels, buckets=buckets)
+
+    def snapshot(self):
+        """Picklable {name: {label values: value}} of everything recorded so far."""
+        return {name: metric.snapshot() for name, metric in list(self._metrics.items())}
+
+    def merge(self, snapshot):
+        for name, values in snapshot.items():
+            metric = self._metrics.get(name)
+            if metric is not None:
+                metric.merge(values)
+
+    def reset(self):
+        for metric in list(self._metrics.values()):
+            metric.reset()
+
+    def render(self, overlays=()):
+        """Prometheus exposition text; overlays are snapshots added on top (running jobs)."""
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            values = metric.snapshot()
+            for overlay in overlays:
+                for key, value in overlay.get(name, {}).items():
+                    values[key] = self._combine(metric, values.get(key), value)
+
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for key, value in sorted(values.items()):
+                labels = dict(zip(metric.labels, key))
+                if metric.kind == "histogram":
+                    counts, total, count = value
+                    cumulative = 0
+                    for bound, n in zip((*metric.buckets, "+Inf"), counts):
+                        cumulative += n
+                        le = bound if bound == "+Inf" else repr(float(bound))
+                        lines.append(f"{name}_bucket{_labels({**labels, 'le': le})} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(labels)} {total!r}")
+                    lines.append(f"{name}_count{_labels(labels)} {count}")
+                else:
+                    lines.append(f"{name}{_labels(labels)} {value!r}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _combine(metric, current, extra):
+        if current is None:
+            return extra
+        if metric.kind == "counter":
+            return current + extra
+        if metric.kind == "histogram":
+            return [[a + b for a, b in zip(current[0], extra[0])], current[1] + extra[1], current[2] + extra[2]]
+        return extra
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+registry = MetricsRegistry()
+
+# === Hot-path metrics ===
+ENV_STEP_SECONDS = registry.histogram(
+    "smarthome_env_step_seconds", "Time per environment step call", ["env"])
+INFERENCE_SECONDS = registry.histogram(
+    "smarthome_policy_inference_seconds", "Policy decision latency", ["path"])
+REPLAY_SECONDS = registry.histogram(
+    "smarthome_replay_update_seconds", "Time per RLAgent.replay minibatch update")
+REPLAY_LOSS = registry.histogram(
+    "smarthome_replay_loss", "Minibatch TD loss",
+    buckets=(0.01, 0.1, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000))
+
+# === Training ===
+TRAINING_EPISODES = registry.counter(
+    "smarthome_training_episodes_total", "Training episodes logged", ["home"])
+TRAINING_EPSILON = registry.gauge(
+    "smarthome_training_epsilon", "Exploration rate after the last logged episode", ["home"])
+TRAINING_LOSS = registry.gauge(
+    "smarthome_training_loss", "Average loss of the last logged episode", ["home"])
+TRAINING_REWARD = registry.gauge(
+    "smarthome_training_reward", "Total reward of the last logged episode", ["home"])
+
+# === I/O ===
+WEATHER_FETCH_SECONDS = registry.histogram(
+    "smarthome_weather_fetch_seconds", "Upstream weather/geolocation request latency", ["kind"])
+WEATHER_FETCH_FAILURES = registry.counter(
+    "smarthome_weather_fetch_failures_total", "Failed weather/geolocation requests", ["kind"])
+SENSOR_FAILURES = registry.counter(
+    "smarthome_sensor_failures_total", "Sensor reads that fell back to the last known value", ["sensor"])
+PERSIST_SECONDS = registry.histogram(
+    "smarthome_persist_write_seconds", "Atomic JSON write time (incl. fsync)", ["file"])
+
+# === HTTP ===
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "smarthome_http_request_seconds", "API request latency", ["method", "route", "status"])
@@ -0,0 +1,177 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from app_logging import get_logger
+from paths import MODELS_DIR
+from rl.policy import NumpyPolicy
+
+log = get_logger("registry")
+
+
+def home_slug(home):
+    """File-name form of a home name ("Living Room" → "living_room"), used for checkpoints and logs."""
+    return home.lower().replace(" ", "_")
+
+
+class ModelRegistry:
+    """
+    Maps each home to its current checkpoint (models/checkpoints/<home>_final.pth plus a
+    <home>_final.json metadata sidecar) and keeps recently used policies loaded in a
+    size-bounded LRU cache. A cached policy is reused until the checkpoint's mtime
+    changes (checked at most every revalidate_sec) or invalidate() is called.
+    Policies are served as inference-only NumpyPolicy objects read from the
+    <home>_final.npz export; torch is only imported to (re)export a stale checkpoint.
+    """
+
+    def __init__(self, capacity=32, checkpoints_dir=MODELS_DIR / "checkpoints", revalidate_sec=1.0):
+        self.capacity = capacity
+        self.checkpoints_dir = checkpoints_dir
+        self.revalidate_sec = revalidate_sec
+        self._cache = OrderedDict()  # home key -> entry dict
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def home_key(home):
+        return home_slug(home)
+
+    def checkpoint_path(self, home):
+        return self.checkpoints_dir / f"{self.home_key(home)}_final.pth"
+
+    def policy_path(self, home):
+        return self.checkpoints_dir / f"{self.home_key(home)}_final.npz"
+
+    def metadata_path(self, home):
+        return self.checkpoints_dir / f"{self.home_key(home)}_final.json"
+
+    def episode_checkpoint_path(self, home, episode):
+        return self.checkpoints_dir / f"{self.home_key(home)}_ep{episode:03d}.pth"
+
+    def replay_path(self, home):
+        return self.checkpoints_dir / f"{self.home_key(home)}_replay.npz"
+
+    def _version(self, home):
+        path = self.checkpoint_path(home)
+        return path.stat().st_mtime_ns if path.exists() else None
+
+    # ---------- Metadata ----------
+    def register(self, home, episodes=None, state_size=None, action_size=None, **extra):
+        """Export a freshly saved checkpoint, record its metadata and drop any cached copy."""
+        from rl.policy_export import export_checkpoint
+
+        exports = export_checkpoint(self.checkpoint_path(home))
+        version = self._version(home)
+        meta = {
+            "home": home,
+            "path": str(self.checkpoint_path(home)),
+            "version": version,
+            "episodes": episodes,
+            "state_size": state_size,
+            "action_size": action_size,
+            "saved_at": datetime.now().isoformat(),
+            "exports": {fmt: str(path) for fmt, path in exports.items()},
+            **extra,
+        }
+        self.metadata_path(home).write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        self.invalidate(home)
+        return meta
+
+    def metadata(self, home):
+        path = self.metadata_path(home)
+        meta = {}
+        if path.exists():
+            try:
+                meta = json.loads(path.read_text(encoding="utf-8"))
+            except json.JSONDecodeError:
+                meta = {}
+        meta.update({"home": home, "path": str(self.checkpoint_path(home)), "version": self._version(home)})
+        return meta
+
+    # ---------- Cache ----------
+    def get(self, home, state_size, action_size):
+        """
+        Inference-only policy for a home. Falls back to freshly initialised weights when
+        there is no checkpoint or it doesn't fit (state_size, action_size).
+        returns (policy, metadata)
+        """
+        key = self.home_key(home)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry["shape"] == (state_size, action_size):
+                if now - entry["checked_at"] < self.revalidate_sec or entry["version"] == self._version(home):
+                    entry["checked_at"] = now
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    return entry["model"], entry["metadata"]
+
+        # Miss: deserialize outside the lock so other homes aren't blocked
+        self.misses += 1
+        model, metadata = self._load(home, state_size, action_size)
+        with self._lock:
+            self._cache[key] = {
+                "model": model,
+                "metadata": metadata,
+                "version": metadata["version"],
+                "shape": (state_size, action_size),
+                "checked_at": now,
+            }
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.capacity:
+                self._cache.popitem(last=False)
+        return model, metadata
+
+    def _load(self, home, state_size, action_size):
+        metadata = self.metadata(home)
+        metadata["trained"] = False
+        policy = None
+        path = self.checkpoint_path(home)
+        if path.exists():
+            policy_path = self.policy_path(home)
+            if not policy_path.exists() or policy_path.stat().st_mtime_ns < path.stat().st_mtime_ns:
+                from rl.policy_export import export_checkpoint
+                export_checkpoint(path, formats=("numpy",))
+            policy = NumpyPolicy.load(policy_path)
+            if (policy.state_size, policy.action_size) == (state_size, action_size):
+                metadata["trained"] = True
+            else:
+                log.warning("checkpoint doesn't fit this environment, serving a random policy", extra={
+                    "home": home, "checkpoint_shape": [policy.state_size, policy.action_size],
+                    "env_shape": [state_size, action_size],
+                })
+                policy = None
+        if policy is None:
+            policy = NumpyPolicy.random(state_size, action_size)
+        return policy, metadata
+
+    def invalidate(self, home=None):
+        with self._lock:
+            if home is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(self.home_key(home), None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "cached": list(self._cache),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
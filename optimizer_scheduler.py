@@ -0,0 +1,213 @@
+import asyncio
+import heapq
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from app_logging import get_logger
+
+log = get_logger("scheduler")
+
+
+class HomeSchedule:
+    """Scheduling and health state of one home's control loop."""
+
+    def __init__(self, home, interval_sec):
+        self.home = home
+        self.interval_sec = interval_sec
+        self.status = "starting"  # starting | running | paused | stopped | failed
+        self.controller = None
+        self.next_run = time.monotonic()
+        self.in_flight = False
+        self.task = None  # the running _tick, awaited before the controller or its live log is closed
+        self.steps = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.last_error = None
+        self.last_step_at = None
+        self.last_step_ms = None
+        self.started_at = datetime.now().isoformat()
+
+    def info(self):
+        return {
+            "home": self.home,
+            "status": self.status,
+            "interval_sec": self.interval_sec,
+            "steps": self.steps,
+            "errors": self.errors,
+            "consecutive_errors": self.consecutive_errors,
+            "last_error": self.last_error,
+            "last_step_at": self.last_step_at,
+            "last_step_ms": self.last_step_ms,
+            "started_at": self.started_at,
+            "next_run_in_sec": max(0.0, round(self.next_run - time.monotonic(), 3)),
+        }
+
+
+class OptimizerScheduler:
+    """
+    Runs every home's live control loop on one asyncio timer wheel instead of one
+    OS thread per home. Due homes are dispatched as tasks; the blocking parts
+    (env/sensor I/O and model inference) run on a bounded thread pool.
+    A home that fails max_consecutive_errors ticks in a row is marked "failed".
+    With an inference server, homes due in the same tick share batched forward passes.
+    Not thread-safe: call activate/stop/pause/resume from the event loop's thread.
+    stop/activate/shutdown wait for a home's in-flight step before its controller (and
+    live log) is closed or replaced.
+    """
+
+    def __init__(self, controller_factory, max_workers=8, max_consecutive_errors=5, inference=None):
+        self.controller_factory = controller_factory  # home_name -> LiveController
+        self.inference = inference  # BatchedPolicyServer or None (each controller infers alone)
+        self.max_consecutive_errors = max_consecutive_errors
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="optimizer")
+        self.homes = {}
+        self._wheel = []  # heap of (next_run, seq, schedule)
+        self._seq = 0
+        self._wakeup = None
+        self._runner = None
+        self._tasks = set()
+
+    # ---------- Lifecycle ----------
+    async def start(self):
+        if self._runner is None:
+            self._wakeup = asyncio.Event()
+            self._runner = asyncio.create_task(self._run())
+
+    async def shutdown(self):
+        if self._runner is not None:
+            self._runner.cancel()
+            self._runner = None
+        for schedule in self.homes.values():
+            schedule.status = "stopped"
+        # in-flight steps finish (a cancelled task can't stop its executor thread) before controllers close
+        if self._tasks:
+            await asyncio.wait(list(self._tasks))
+        for schedule in self.homes.values():
+            if schedule.controller is not None:
+                schedule.controller.close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # ---------- Control ----------
+    async def activate(self, home, interval_sec):
+        schedule = self.homes.get(home)
+        if schedule is not None and schedule.status in ("starting", "running", "paused"):
+            return None
+        if schedule is not None:
+            # the new controller reopens the home's live log: let the old step finish first
+            await self._drain(schedule)
+            schedule = self.homes.get(home)
+            if schedule is not None and schedule.status in ("starting", "running", "paused"):
+                return None  # activated by another request while we waited
+        schedule = self.homes[home] = HomeSchedule(home, interval_sec)
+        self._push(schedule)
+        return schedule.info()
+
+    async def stop(self, home):
+        schedule = self.homes.get(home)
+        if schedule is None:
+            return None
+        schedule.status = "stopped"
+        await self._drain(schedule)
+        if schedule.controller is not None:
+            schedule.controller.close()
+        return schedule.info()
+
+    @staticmethod
+    async def _drain(schedule):
+        """Wait, without cancelling, for the home's in-flight tick."""
+        task = schedule.task
+        if task is not None and not task.done():
+            await asyncio.wait({task})
+
+    def pause(self, home):
+        schedule = self.homes.get(home)
+        if schedule is None:
+            return None
+        if schedule.status in ("starting", "running"):
+            schedule.status = "paused"
+        return schedule.info()
+
+    def resume(self, home):
+        schedule = self.homes.get(home)
+        if schedule is None:
+            return None
+        if schedule.status == "paused":
+            schedule.status = "running" if schedule.controller is not None else "starting"
+            schedule.next_run = time.monotonic()
+            self._push(schedule)
+        return schedule.info()
+
+    def list_homes(self):
+        return [schedule.info() for schedule in self.homes.values()]
+
+    # ---------- Timer wheel ----------
+    def _push(self, schedule):
+        self._seq += 1
+        heapq.heappush(self._wheel, (schedule.next_run, self._seq, schedule))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            now = time.monotonic()
+            while self._wheel and self._wheel[0][0] <= now:
+                due, _, schedule = heapq.heappop(self._wheel)
+                # stale entries are dropped: a replaced schedule (stop + activate), an entry
+                # superseded by a later _push (resume, tick reschedule), or a home not runnable now
+                if (self.homes.get(schedule.home) is not schedule or due != schedule.next_run
+                        or schedule.status not in ("starting", "running") or schedule.in_flight):
+                    continue
+                schedule.in_flight = True
+                task = schedule.task = asyncio.create_task(self._tick(schedule))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+            timeout = max(0.0, self._wheel[0][0] - now) if self._wheel else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _tick(self, schedule):
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        try:
+            if schedule.controller is None:
+                schedule.controller = await loop.run_in_executor(
+                    self.executor, self.controller_factory, schedule.home
+                )
+                if schedule.status == "starting":
+                    schedule.status = "running"
+            await self._step(schedule, loop)
+            schedule.steps += 1
+            schedule.consecutive_errors = 0
+            schedule.last_step_at = datetime.now().isoformat()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            schedule.errors += 1
+            schedule.consecutive_errors += 1
+            schedule.last_error = repr(e)
+            log.error("live optimizer step failed",
+                      extra={"home": schedule.home, "consecutive_errors": schedule.consecutive_errors, "error": repr(e)})
+            if schedule.consecutive_errors >= self.max_consecutive_errors:
+                schedule.status = "failed"
+        finally:
+            schedule.in_flight = False
+            schedule.last_step_ms = round((time.monotonic() - started) * 1000, 2)
+
+        if schedule.status in ("starting", "running"):
+            schedule.next_run = started + schedule.interval_sec
+            self._push(schedule)
+        elif schedule.status in ("stopped", "failed") and schedule.controller is not None:
+            schedule.controller.close()
+
+    async def _step(self, schedule, loop):
+        controller = schedule.controller
+        if self.inference is None:
+            await loop.run_in_executor(self.executor, controller.step)
+            return
+        action = await self.inference.infer(controller.policy, controller.state)
+        await loop.run_in_executor(self.executor, controller.apply, action)
@@ -3,16 +3,14 @@ from pathlib import Path
 
 # Automatically detect the project root (two levels up from this file)
 PROJECT_ROOT = Path(__file__).resolve().parents[0]
+# Plain path constants: importing this module never touches the filesystem.
+# Code that writes under these directories creates what it needs (mkdir(parents=True)).
+
 # Data directory (shared across all components)
 DATA_DIR = PROJECT_ROOT / "data"
-DATA_DIR.mkdir(parents=True, exist_ok=True)  # ensure it exists
-
 RAW_DATA_DIR = PROJECT_ROOT / "raw_data"
-RAW_DATA_DIR.mkdir(parents=True, exist_ok=True)  # ensure it exists
 
 # Models directory
 MODELS_DIR = PROJECT_ROOT / "models"
-MODELS_DIR.mkdir(parents=True, exist_ok=True)
 
 LOGS_DIR = PROJECT_ROOT / "logs"
-LOGS_DIR.mkdir(parents=True, exist_ok=True)
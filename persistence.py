@@ -0,0 +1,117 @@
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+import weakref
+from pathlib import Path
+
+from app_logging import get_logger
+from metrics import PERSIST_SECONDS
+
+log = get_logger("persistence")
+
+
+def atomic_write_json(path, data, indent=2):
+    """
+    Write JSON to a temp file in the same directory, fsync it, then rename it over
+    the target. Readers see either the old file or the new one, never a partial write.
+    """
+    started = time.perf_counter()
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        PERSIST_SECONDS.observe(time.perf_counter() - started, file=path.name)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class DebouncedJsonWriter:
+    """
+    Write-behind persistence for one JSON file. schedule() marks the data dirty and
+    arms a timer; every mutation inside the window is merged into a single atomic write.
+    delay_sec=0 writes synchronously. `lock` guards both serialization and the owner's
+    mutations, so pass the lock the owner already mutates under. The file's mtime at
+    the last load/write is tracked so the owner can re-read it when someone else edits it.
+    """
+
+    _instances = weakref.WeakSet()
+
+    def __init__(self, path, get_data, delay_sec=0.5, lock=None):
+        self.path = Path(path)
+        self.get_data = get_data  # called at flush time → the object to serialize
+        self.delay_sec = delay_sec
+        self.lock = lock or threading.RLock()
+        self.mtime = None  # file mtime at last load/write, see reload_if_changed()
+        self.dirty = False
+        self.writes = 0
+        self._timer = None
+        DebouncedJsonWriter._instances.add(self)
+
+    def schedule(self):
+        with self.lock:
+            self.dirty = True
+            if self.delay_sec <= 0:
+                self.flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.delay_sec, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Write pending changes now instead of waiting for the debounce window."""
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self.dirty:
+                return False
+            atomic_write_json(self.path, self.get_data())
+            self.dirty = False
+            self.writes += 1
+            self.mark_synced()
+            return True
+
+    def file_mtime(self):
+        try:
+            return self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def mark_synced(self, mtime=None):
+        """
+        The in-memory data now matches the file (just loaded or written outside flush()).
+        mtime: the file's mtime taken before it was read, if the owner read it
+        """
+        self.mtime = self.file_mtime() if mtime is None else mtime
+
+    def reload_if_changed(self, reload):
+        """Call reload() only if the file changed on disk since the last load/write."""
+        with self.lock:
+            if self.dirty or self.file_mtime() == self.mtime:
+                return False  # unflushed in-memory changes are newer than the file
+            reload()
+            return True
+
+    @classmethod
+    def flush_all(cls):
+        for writer in list(cls._instances):
+            try:
+                writer.flush()
+            except Exception as e:
+                log.error("flush failed", extra={"path": str(writer.path), "error": str(e)})
+
+
+# Pending writes must not be lost when the process exits inside a debounce window
+atexit.register(DebouncedJsonWriter.flush_all)
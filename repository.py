@@ -0,0 +1,60 @@
+import copy
+import threading
+from contextlib import contextmanager
+
+from device_manager import DeviceManager
+from home_manager import HomeManager
+from paths import DATA_DIR
+
+
+class Repository:
+    """
+    Long-lived, thread-safe owner of the homes and the device catalog.
+    Both files are parsed once and served from memory; they are re-read only
+    when their mtime changes (e.g. edited by hand or by another process).
+    """
+
+    def __init__(self, homes_path=DATA_DIR / "homes.json", catalog_path=None, flush_delay=0.5):
+        self._lock = threading.RLock()
+        # managers serialize their write-behind flushes under the same lock
+        self.devices = DeviceManager(catalog_path, flush_delay=flush_delay, lock=self._lock)
+        self.homes = HomeManager(homes_path, device_manager=self.devices, flush_delay=flush_delay, lock=self._lock)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Hold the repository lock for a read-modify-write sequence:
+            with repo.transaction() as r:
+                r.homes.add_room(...)
+        """
+        with self._lock:
+            self.devices.reload_if_changed()
+            self.homes.reload_if_changed()
+            yield self
+
+    def flush(self):
+        with self._lock:
+            self.devices.flush()
+            self.homes.flush()
+
+    # ---------- Reads (memory-only unless a file changed) ----------
+    def get_homes(self):
+        with self.transaction():
+            return copy.deepcopy(self.homes.homes)
+
+    def get_devices(self):
+        with self.transaction():
+            return copy.deepcopy(self.devices.get_all_devices())
+
+
+_repository = None
+_repository_lock = threading.Lock()
+
+
+def get_repository():
+    """Process-wide Repository; also usable as a FastAPI dependency."""
+    global _repository
+    with _repository_lock:
+        if _repository is None:
+            _repository = Repository()
+        return _repository
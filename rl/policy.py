@@ -0,0 +1,97 @@
+import os
+import tempfile
+
+import numpy as np
+
+
+class NumpyPolicy:
+    """
+    Inference-only DQN policy: the Linear/ReLU stack of rl_agent.DQN as plain NumPy
+    arrays. No torch, no optimizer, no autograd — this is what the live agent and the
+    API run. Layers are (W, b) with W shaped (in, out); ReLU between all but the last.
+    """
+
+    def __init__(self, layers):
+        self.layers = [
+            (np.ascontiguousarray(W, dtype=np.float32), np.ascontiguousarray(b, dtype=np.float32))
+            for W, b in layers
+        ]
+
+    @property
+    def state_size(self):
+        return self.layers[0][0].shape[0]
+
+    @property
+    def action_size(self):
+        return self.layers[-1][0].shape[1]
+
+    @property
+    def signature(self):
+        """Layer shapes; policies with equal signatures can be evaluated as one stack."""
+        return tuple(W.shape for W, _ in self.layers)
+
+    # ---------- Construction ----------
+    @classmethod
+    def random(cls, state_size, action_size, hidden=(64, 64), rng=None):
+        """Untrained policy, initialised like torch.nn.Linear (uniform ±1/sqrt(fan_in))."""
+        rng = rng if rng is not None else np.random.default_rng()
+        sizes = [state_size, *hidden, action_size]
+        layers = []
+        for fan_in, fan_out in zip(sizes[:-1], sizes[1:]):
+            bound = 1.0 / np.sqrt(fan_in)
+            layers.append((rng.uniform(-bound, bound, (fan_in, fan_out)), rng.uniform(-bound, bound, fan_out)))
+        return cls(layers)
+
+    @classmethod
+    def from_state_dict(cls, state_dict):
+        """From a DQN state_dict (fc.<i>.weight / fc.<i>.bias, tensors or arrays)."""
+        def to_numpy(value):
+            return value.detach().cpu().numpy() if hasattr(value, "detach") else np.asarray(value)
+
+        indices = sorted({int(key.split(".")[1]) for key in state_dict if key.endswith(".weight")})
+        return cls([
+            (to_numpy(state_dict[f"fc.{i}.weight"]).T, to_numpy(state_dict[f"fc.{i}.bias"]))
+            for i in indices
+        ])
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            n_layers = len([key for key in data.files if key.startswith("W")])
+            return cls([(data[f"W{i}"], data[f"b{i}"]) for i in range(n_layers)])
+
+    def save(self, path):
+        """Write W0, b0, W1, … to an .npz (atomic replace)."""
+        arrays = {}
+        for i, (W, b) in enumerate(self.layers):
+            arrays[f"W{i}"] = W
+            arrays[f"b{i}"] = b
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".npz.tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    # ---------- Inference ----------
+    def q_values(self, states):
+        """Q-values for one state (state_size,) or a batch (N, state_size)."""
+        x = np.asarray(states, dtype=np.float32)
+        last = len(self.layers) - 1
+        for i, (W, b) in enumerate(self.layers):
+            x = x @ W + b
+            if i < last:
+                np.maximum(x, 0.0, out=x)
+        return x
+
+    __call__ = q_values
+
+    def act(self, state):
+        """Greedy action for one state."""
+        return int(np.argmax(self.q_values(state)))
+
+    def act_batch(self, states):
+        return self.q_values(states).argmax(axis=-1)
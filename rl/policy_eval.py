@@ -0,0 +1,103 @@
+import itertools
+
+import numpy as np
+
+from rl.vec_environment import VecSmartHomeEnv
+
+DEFAULT_OUTDOOR_TEMPS = np.arange(10.0, 40.01, 2.5)  # 13 values
+DEFAULT_INDOOR_TEMPS = np.arange(20.0, 26.01, 1.0)   # 7 values
+
+
+def scenario_grid_size(outdoor_temps=None, indoor_temps=None, comfort_ranges=None):
+    """Number of scenarios scenario_grid() would build, without building them."""
+    outdoor_temps = DEFAULT_OUTDOOR_TEMPS if outdoor_temps is None else outdoor_temps
+    indoor_temps = DEFAULT_INDOOR_TEMPS if indoor_temps is None else indoor_temps
+    return len(outdoor_temps) * len(indoor_temps) * (len(comfort_ranges) if comfort_ranges else 1)
+
+
+def scenario_grid(outdoor_temps=None, indoor_temps=None, comfort_ranges=None):
+    """
+    Full cartesian grid of (outdoor temp, starting indoor temp, comfort range).
+    Without comfort_ranges every scenario keeps the home's own comfort band.
+    returns dict of (n,) arrays: outdoor_temp, indoor_temp, comfort_min, comfort_max
+    """
+    outdoor_temps = DEFAULT_OUTDOOR_TEMPS if outdoor_temps is None else outdoor_temps
+    indoor_temps = DEFAULT_INDOOR_TEMPS if indoor_temps is None else indoor_temps
+    comforts = [tuple(c) for c in comfort_ranges] if comfort_ranges else [(np.nan, np.nan)]
+    rows = list(itertools.product(outdoor_temps, indoor_temps, comforts))
+    return {
+        "outdoor_temp": np.array([r[0] for r in rows], dtype=np.float64),
+        "indoor_temp": np.array([r[1] for r in rows], dtype=np.float64),
+        "comfort_min": np.array([r[2][0] for r in rows], dtype=np.float64),
+        "comfort_max": np.array([r[2][1] for r in rows], dtype=np.float64),
+    }
+
+
+def sample_scenarios(n, seed=0, outdoor_range=(10, 40), indoor_range=(20, 26), comfort_ranges=None):
+    """n scenarios drawn uniformly from the given ranges (reproducible for a seed)."""
+    rng = np.random.default_rng(seed)
+    comforts = np.array(comfort_ranges or [(np.nan, np.nan)], dtype=np.float64)
+    picks = comforts[rng.integers(len(comforts), size=n)]
+    return {
+        "outdoor_temp": rng.uniform(*outdoor_range, n),
+        "indoor_temp": rng.uniform(*indoor_range, n),
+        "comfort_min": picks[:, 0],
+        "comfort_max": picks[:, 1],
+    }
+
+
+def _distribution(values):
+    return {
+        "mean": round(float(values.mean()), 3),
+        "std": round(float(values.std()), 3),
+        "p5": round(float(np.percentile(values, 5)), 3),
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p95": round(float(np.percentile(values, 95)), 3),
+    }
+
+
+def evaluate_policy(policy, scenarios, home_name="Default", horizon=24, env=None):
+    """
+    Roll a greedy policy out over every scenario at once: one VecSmartHomeEnv with one
+    env per scenario, one batched forward pass and one array step per hour.
+    Comfort violation follows the live log: |indoor - comfort center| for each hour
+    spent outside the comfort band, summed over the horizon.
+    """
+    n = len(scenarios["outdoor_temp"])
+    env = env or VecSmartHomeEnv(home_name, num_envs=n, max_steps=horizon)
+    # NaN comfort bounds mean "the home's own comfort band"
+    comfort_min = np.where(np.isnan(scenarios["comfort_min"]), env.comfort_min, scenarios["comfort_min"])
+    comfort_max = np.where(np.isnan(scenarios["comfort_max"]), env.comfort_max, scenarios["comfort_max"])
+    states = env.reset(
+        indoor_temp=scenarios["indoor_temp"],
+        outdoor_temp=scenarios["outdoor_temp"],
+        comfort_range=(comfort_min, comfort_max),
+    )
+
+    total_reward = np.zeros(n)
+    violation = np.zeros(n)
+    hours_outside = np.zeros(n)
+    action_counts = np.zeros(len(env.action_space), dtype=np.int64)
+    for _ in range(horizon):
+        actions = policy.act_batch(states)
+        states, rewards, dones, info = env.step(actions)
+        total_reward += rewards
+        outside = (info["indoor_temp"] < env.comfort_min) | (info["indoor_temp"] > env.comfort_max)
+        violation += np.where(outside, np.abs(info["indoor_temp"] - env.comfort_center), 0.0)
+        hours_outside += outside
+        action_counts += np.bincount(actions, minlength=len(action_counts))
+
+    top_actions = [
+        {"device": env.action_space[i][0], "action": env.action_space[i][1],
+         "share": round(float(action_counts[i] / action_counts.sum()), 3)}
+        for i in np.argsort(-action_counts)[:5] if action_counts[i] > 0
+    ]
+    return {
+        "scenarios": n,
+        "horizon": horizon,
+        "reward": _distribution(total_reward),
+        "energy_kWh": _distribution(env.total_kWh),
+        "comfort_violation": _distribution(violation),
+        "hours_outside_comfort": _distribution(hours_outside),
+        "top_actions": top_actions,
+    }
@@ -0,0 +1,69 @@
+from pathlib import Path
+
+import torch
+
+from app_logging import get_logger
+from rl.policy import NumpyPolicy
+from rl.rl_agent import DQN
+
+log = get_logger("export")
+
+EXPORT_FORMATS = ("numpy", "torchscript", "onnx")
+
+
+def _dqn_from_checkpoint(checkpoint_path):
+    state_dict = torch.load(checkpoint_path, weights_only=True)
+    # first and last Linear by fc.<i> index, whatever else (dropout, norm buffers) sits in between
+    indices = sorted(int(key.split(".")[1]) for key in state_dict
+                     if key.startswith("fc.") and key.endswith(".weight"))
+    state_size = state_dict[f"fc.{indices[0]}.weight"].shape[1]
+    action_size = state_dict[f"fc.{indices[-1]}.weight"].shape[0]
+    model = DQN(state_size, action_size)
+    model.load_state_dict(state_dict)
+    model.eval()
+    return model
+
+
+def export_checkpoint(checkpoint_path, formats=("numpy", "torchscript")):
+    """
+    Turn a trained DQN checkpoint (<name>.pth) into inference artifacts next to it:
+      numpy       → <name>.npz     (NumpyPolicy, no torch needed to load)
+      torchscript → <name>.ts.pt   (torch.jit.load, no Python class needed)
+      onnx        → <name>.onnx    (needs the optional `onnx` package)
+    returns {format: path} of what was written
+    """
+    checkpoint_path = Path(checkpoint_path)
+    unknown = set(formats) - set(EXPORT_FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown export formats: {sorted(unknown)}")
+
+    model = _dqn_from_checkpoint(checkpoint_path)
+    example = torch.zeros(1, model.fc[0].in_features)
+    written = {}
+
+    if "numpy" in formats:
+        path = checkpoint_path.with_suffix(".npz")
+        NumpyPolicy.from_state_dict(model.state_dict()).save(path)
+        written["numpy"] = path
+
+    if "torchscript" in formats:
+        path = checkpoint_path.with_suffix(".ts.pt")
+        with torch.no_grad():
+            torch.jit.trace(model, example).save(str(path))
+        written["torchscript"] = path
+
+    if "onnx" in formats:
+        path = checkpoint_path.with_suffix(".onnx")
+        try:
+            torch.onnx.export(
+                model, (example,), str(path),
+                input_names=["state"], output_names=["q_values"],
+                dynamic_axes={"state": {0: "batch"}, "q_values": {0: "batch"}},
+            )
+            written["onnx"] = path
+        except ImportError as e:
+            log.warning("ONNX export skipped, install `onnx` to enable it", extra={"error": str(e)})
+
+    for fmt, path in written.items():
+        log.info("policy exported", extra={"format": fmt, "path": str(path)})
+    return written
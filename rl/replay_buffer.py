@@ -0,0 +1,117 @@
+from pathlib import Path
+
+import numpy as np
+
+
+class ReplayBuffer:
+    """
+    Fixed-capacity ring buffer of transitions backed by preallocated NumPy arrays.
+    Insertion is O(1), sampling draws a vector of indices, and sampled batches are
+    contiguous arrays that torch.from_numpy() wraps without copying.
+    """
+
+    def __init__(self, state_size, capacity=100_000, rng=None):
+        self.state_size = int(state_size)
+        self.capacity = int(capacity)
+
+        self.states = np.zeros((self.capacity, self.state_size), dtype=np.float32)
+        self.actions = np.zeros(self.capacity, dtype=np.int64)
+        self.rewards = np.zeros(self.capacity, dtype=np.float32)
+        self.next_states = np.zeros((self.capacity, self.state_size), dtype=np.float32)
+        self.dones = np.zeros(self.capacity, dtype=np.float32)
+
+        self.position = 0  # next slot to write
+        self.size = 0
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state, done):
+        i = self.position
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = float(done)
+
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        """Insert a batch of transitions (leading axis = batch) with wrap-around."""
+        n = len(actions)
+        if n > self.capacity:
+            states, actions, rewards, next_states, dones = (
+                np.asarray(a)[-self.capacity:] for a in (states, actions, rewards, next_states, dones)
+            )
+            n = self.capacity
+        idx = (self.position + np.arange(n)) % self.capacity
+        self.states[idx] = states
+        self.actions[idx] = actions
+        self.rewards[idx] = rewards
+        self.next_states[idx] = next_states
+        self.dones[idx] = dones
+
+        self.position = (self.position + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+
+    def sample(self, batch_size):
+        """
+        Draw batch_size distinct transitions.
+        returns (states, actions, rewards, next_states, dones) as contiguous arrays
+        """
+        idx = self.rng.choice(self.size, size=batch_size, replace=False)
+        return (
+            self.states[idx],
+            self.actions[idx],
+            self.rewards[idx],
+            self.next_states[idx],
+            self.dones[idx],
+        )
+
+    def clear(self):
+        self.position = 0
+        self.size = 0
+
+    # ---------- Persistence ----------
+    def save(self, path):
+        """Save the filled part of the buffer (oldest → newest) to a .npz file."""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        order = self._chronological_indices()
+        np.savez(
+            path,
+            states=self.states[order],
+            actions=self.actions[order],
+            rewards=self.rewards[order],
+            next_states=self.next_states[order],
+            dones=self.dones[order],
+        )
+
+    def load(self, path):
+        """
+        Load transitions saved by save(). If the file holds more transitions than
+        the capacity, only the most recent ones are kept.
+        returns the number of transitions loaded
+        """
+        with np.load(path) as data:
+            states = data["states"]
+            if states.ndim != 2 or states.shape[1] != self.state_size:
+                raise ValueError(
+                    f"Replay buffer state size {states.shape[1:]} does not match {self.state_size}"
+                )
+            n = min(len(states), self.capacity)
+            self.states[:n] = states[-n:]
+            self.actions[:n] = data["actions"][-n:]
+            self.rewards[:n] = data["rewards"][-n:]
+            self.next_states[:n] = data["next_states"][-n:]
+            self.dones[:n] = data["dones"][-n:]
+
+        self.size = n
+        self.position = n % self.capacity
+        return n
+
+    def _chronological_indices(self):
+        if self.size < self.capacity:
+            return np.arange(self.size)
+        return (np.arange(self.capacity) + self.position) % self.capacity
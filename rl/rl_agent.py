@@ -1,12 +1,17 @@
 import os
+import time
+from contextlib import contextmanager
 
 import torch
 import torch.nn as nn
 import torch.optim as optim
-import random
 import numpy as np
-from collections import deque
+from app_logging import get_logger
+from metrics import REPLAY_LOSS, REPLAY_SECONDS
 from paths import MODELS_DIR
+from rl.replay_buffer import ReplayBuffer
+
+log = get_logger("agent")
 
 # DEEP Q-STATE Nural Network
 class DQN(nn.Module):
@@ -25,36 +30,50 @@ class DQN(nn.Module):
 
 
 class RLAgent:
-    def __init__(self, state_size, action_size):
-        self.model = DQN(state_size, action_size)
-        self.memory = deque(maxlen=2000)
-        self.optimizer = optim.Adam(self.model.parameters(), lr=0.001)
+    def __init__(self, state_size, action_size, memory_size=2000, lr=0.001, gamma=0.95,
+                 epsilon=1.0, epsilon_decay=0.995, epsilon_min=0.1, seed=None):
+        # Independent streams for exploration, replay sampling and weight init, all
+        # derived from `seed` → two agents with the same seed behave identically
+        exploration_seed, replay_seed, torch_seed = np.random.SeedSequence(seed).spawn(3)
+        self.rng = np.random.default_rng(exploration_seed)
+        self.torch_seed = int(torch_seed.generate_state(1)[0])
+        with self._torch_rng():
+            self.model = DQN(state_size, action_size)
+        self.memory = ReplayBuffer(state_size, capacity=memory_size, rng=np.random.default_rng(replay_seed))
+        self.optimizer = optim.Adam(self.model.parameters(), lr=lr)
         self.criterion = nn.MSELoss()
-        self.gamma = 0.95
-        self.epsilon = 1.0
-        self.epsilon_decay = 0.995
-        self.epsilon_min = 0.1
+        self.gamma = gamma
+        self.epsilon = epsilon
+        self.epsilon_decay = epsilon_decay
+        self.epsilon_min = epsilon_min
+
+    @contextmanager
+    def _torch_rng(self):
+        """Torch's global RNG, forked and seeded from the agent's own seed (weight init)."""
+        with torch.random.fork_rng(devices=[]):
+            torch.manual_seed(self.torch_seed)
+            yield
 
     def save_model(self, path=MODELS_DIR / "checkpoints/agent_model.pth"):
         os.makedirs(os.path.dirname(path), exist_ok=True)
         torch.save(self.model.state_dict(), path)
-        print(f"✅ Model saved to: {path}")
+        log.info("model saved", extra={"path": str(path)})
 
     def load_model(self, path):
         if not os.path.exists(path):
-            print(f"⚠️ No model found for this home at: {path}")
-            print("➡️ Starting training from scratch.")
+            log.info("no model found for this home, starting training from scratch", extra={"path": str(path)})
             return
 
         try:
             state_dict = torch.load(path, weights_only=True)
             self.model.load_state_dict(state_dict)
             self.model.eval()
-            print(f"📦 Model loaded successfully from: {path}")
+            log.info("model loaded", extra={"path": str(path)})
         except RuntimeError as e:
-            print(f"⚠️ Model mismatch or outdated checkpoint: {e}")
-            print("🔄 Resetting model weights for new architecture...")
-            self.model.apply(self._init_weights)
+            log.warning("model mismatch or outdated checkpoint, resetting weights for the new architecture",
+                        extra={"path": str(path), "error": str(e)})
+            with self._torch_rng():
+                self.model.apply(self._init_weights)
 
     def _init_weights(self, m):
         if isinstance(m, nn.Linear):
@@ -63,23 +82,73 @@ class RLAgent:
                 nn.init.zeros_(m.bias)
 
     def act(self, state):
-        if random.random() < self.epsilon:
-            return random.randrange(self.model.fc[-1].out_features)
-        q_values = self.model(torch.FloatTensor(state))
+        if self.rng.random() < self.epsilon:
+            return int(self.rng.integers(self.model.fc[-1].out_features))
+        with torch.no_grad():
+            q_values = self.model(torch.as_tensor(state, dtype=torch.float32))
         return torch.argmax(q_values).item()
 
-    def remember(self, state, action, reward, next_state, done):
-        self.memory.append((state, action, reward, next_state, done))
+    def act_batch(self, states):
+        """Epsilon-greedy actions for a (N, state_size) batch with one forward pass."""
+        states = np.asarray(states, dtype=np.float32)
+        with torch.no_grad():
+            greedy = self.model(torch.from_numpy(states)).argmax(dim=1).numpy()
+        explore = self.rng.random(len(states)) < self.epsilon
+        random_actions = self.rng.integers(self.model.fc[-1].out_features, size=len(states))
+        return np.where(explore, random_actions, greedy)
 
-    def replay(self, batch_size=32):
+    def remember(self, state, action, reward, next_state, done):
+        self.memory.add(state, action, reward, next_state, done)
+
+    def remember_batch(self, states, actions, rewards, next_states, dones):
+        self.memory.add_batch(states, actions, rewards, next_states, dones)
+
+    def replay(self, batch_size=32, batched=True):
+        """
+        Train the Q-network on one random minibatch from memory.
+        batched=True stacks the whole minibatch into tensors and performs a single
+        forward/backward/step; batched=False keeps the original per-transition update
+        so both can be compared. Returns the average loss for KPI tracking.
+        """
         if len(self.memory) < batch_size:
             return 0.0  # no training yet
 
-        batch = random.sample(self.memory, batch_size)
+        started = time.perf_counter()
+        batch = self.memory.sample(batch_size)
+        if batched:
+            avg_loss = self._replay_batched(batch)
+        else:
+            avg_loss = self._replay_per_sample(batch)
+        REPLAY_SECONDS.observe(time.perf_counter() - started)
+        REPLAY_LOSS.observe(avg_loss)
+
+        if self.epsilon > self.epsilon_min:
+            self.epsilon *= self.epsilon_decay
+
+        # ✅ Return average loss for KPI tracking
+        return avg_loss
+
+    def _replay_batched(self, batch):
+        # sampled arrays are contiguous → wrapped without copying
+        states, actions, rewards, next_states, dones = (torch.from_numpy(a) for a in batch)
+
+        # Bellman targets for the whole minibatch in one forward pass
+        with torch.no_grad():
+            next_q = self.model(next_states).max(dim=1).values
+            targets = rewards + self.gamma * next_q * (1.0 - dones)
+
+        current = self.model(states).gather(1, actions.unsqueeze(1)).squeeze(1)
+        loss = self.criterion(current, targets)
+        self.optimizer.zero_grad()
+        loss.backward()
+        self.optimizer.step()
+        return loss.item()
+
+    def _replay_per_sample(self, batch):
         total_loss = 0.0
 
-        for state, action, reward, next_state, done in batch:
-            target = reward
+        for state, action, reward, next_state, done in zip(*batch):
+            target = float(reward)
             if not done:
                 target += self.gamma * torch.max(self.model(torch.FloatTensor(next_state))).item()
 
@@ -90,8 +159,4 @@ class RLAgent:
             self.optimizer.step()
             total_loss += loss.item()
 
-        if self.epsilon > self.epsilon_min:
-            self.epsilon *= self.epsilon_decay
-
-        # ✅ Return average loss for KPI tracking
-        return total_loss / batch_size
+        return total_loss / len(batch[0])
@@ -1,47 +1,65 @@
 import json
-import random
-from pathlib import Path
+import time
+from datetime import datetime
 from paths import DATA_DIR
 import numpy as np
-from device_manager import DeviceManager
-from home_manager import HomeManager
+from app_logging import get_logger
+from model_registry import get_model_registry
+from repository import get_repository
 from impact_calibrator import ImpactCalibrator
-from rl.rl_utils import get_user_location, get_real_outdoor_temp, get_real_indoor_temp, get_real_energy_usage
+from forecast import FORECAST_SIZE
+from metrics import ENV_STEP_SECONDS, SENSOR_FAILURES
+from rl.rl_utils import get_real_indoor_temp, get_real_energy_usage
+from rl.weather_provider import get_fixture_weather_provider, get_weather_provider
+
+log = get_logger("env")
+
+
+class ActionSpaceChanged(RuntimeError):
+    """The home's (device, permission) actions changed; the env and its policy must be rebuilt."""
 
 
 class SmartHomeEnv:
 
-    def __init__(self, home_name=None, mode="real", comfort_range=(20, 27)):
+    def __init__(self, home_name=None, mode="real", comfort_range=(20, 27), seed=None, forecaster=None,
+                 weather_provider=None):
 
+        # own RNG for simulated temperatures: same seed → same trajectory
+        self.rng = np.random.default_rng(seed)
+        # optional forecast.Forecaster: the state gains [predicted_temp, predicted_kWh] for the current hour
+        self.forecaster = forecaster
+        self._forecast = None
         self.outdoor_temp = None
         self.indoor_temp = None
         self.total_kWh = None
 
-        loc = get_user_location()
+        # sim mode never goes to the network: location and weather come from the offline fixture
+        if weather_provider is None:
+            weather_provider = get_weather_provider() if mode == "real" else get_fixture_weather_provider()
+        self.weather = weather_provider
+        loc = self.weather.get_location()
         self.city = loc["city"]
         self.lat = loc["lat"]
         self.lon = loc["lon"]
         self.country = loc["country"]
 
         self.home_name = home_name
-        self.home_manager = HomeManager()
-        self.manager = DeviceManager()
+        self.repository = get_repository()
+        self.home_manager = self.repository.homes
+        self.manager = self.repository.devices
         self.mode = mode
 
         # specific for new home or falls into default values min in-temp, max in-temp, set self.indoor_temp range
-        if self.home_name and self.home_name in self.home_manager.homes:
-            print(f"🏠 Loading environment for home: {self.home_name}")
-            self.devices = {
-                d: self.manager.get_all_devices()[d]
-                for d in self.home_manager.get_home_devices(self.home_name)
-            }
-            self.comfort_min, self.comfort_max = self.home_manager.homes[self.home_name].get(
-                "comfort_range", comfort_range
-            )
-        else:
-            print("⚙️ No specific home provided. Using global device catalog.")
-            self.devices = self.manager.get_all_devices()
-            self.comfort_min, self.comfort_max = comfort_range
+        with self.repository.transaction():
+            if self.home_name and self.home_name in self.home_manager.homes:
+                log.debug("loading environment for home", extra={"home": self.home_name})
+                self.comfort_min, self.comfort_max = self.home_manager.homes[self.home_name].get(
+                    "comfort_range", comfort_range
+                )
+            else:
+                log.debug("no home given, using the global device catalog")
+                self.comfort_min, self.comfort_max = comfort_range
+            self.devices = self._select_devices()
 
         # here can get any real data from sensors
         self._out_temp()
@@ -51,18 +69,19 @@ class SmartHomeEnv:
         self.step_count = 0
 
         # --- Load or create impact map ---
-        impact_path = DATA_DIR / "impact_map.json"
-        impact_path.parent.mkdir(parents=True, exist_ok=True)
-        if not impact_path.exists():
-            print("⚠️ Impact map not found. Running calibration...")
-            calibrator = ImpactCalibrator()
-            calibrator.calibrate()
-
-        with open(impact_path, "r", encoding="utf-8") as f:
-            self.rules = json.load(f)
+        self.impact_path = DATA_DIR / "impact_map.json"
+        self.impact_path.parent.mkdir(parents=True, exist_ok=True)
+        if not self.impact_path.exists():
+            log.warning("impact map not found, running calibration", extra={"path": str(self.impact_path)})
+            with self.repository.transaction():
+                calibrator = ImpactCalibrator(devices=self.manager.get_all_devices())
+                calibrator.calibrate()
 
+        self.rules = self._load_rules()
         self.action_space = self._build_action_space()
         self.state_size = 2  # indoor_temp, total_kWh = what the RL model will predict on, default = 2
+        if forecaster is not None:
+            self.state_size += FORECAST_SIZE
 
     def _is_weekend(self):
         # get_if_weekend() from rl/rl_utils.py
@@ -70,23 +89,25 @@ class SmartHomeEnv:
 
     def _out_temp(self):
         if self.mode == "real":
-            self.outdoor_temp = get_real_outdoor_temp(self.lat, self.lon)
-            print(f"🌍 Using real weather for {self.city}, {self.country}: {self.outdoor_temp:.1f}°C")
+            self.outdoor_temp = self.weather.get_outdoor_temp(self.lat, self.lon)
+            log.debug("real outdoor temperature", extra={"city": self.city, "outdoor_temp": self.outdoor_temp})
         else:
-            self.outdoor_temp = random.uniform(10, 40)
-            print(f"🌡️ Using simulated outdoor temp: {self.outdoor_temp:.1f}°C")
+            self.outdoor_temp = float(self.rng.uniform(10, 40))
+            log.debug("simulated outdoor temperature", extra={"outdoor_temp": self.outdoor_temp})
 
     def _indoor_temp(self):
         if self.mode == "real":
             # Example: call a sensor API or GPIO reader
             try:
                 self.indoor_temp = get_real_indoor_temp()
-                print(f"🏡 Real indoor temp: {self.indoor_temp:.1f}°C")
+                log.debug("real indoor temperature", extra={"indoor_temp": self.indoor_temp})
             except Exception as e:
-                print(f"⚠️ Sensor error: {e}, fallback to last known value.")
-                self.indoor_temp = getattr(self, "indoor_temp", np.mean([self.comfort_min, self.comfort_max]))
+                SENSOR_FAILURES.inc(sensor="indoor_temp")
+                log.warning("indoor temperature sensor failed, using last known value", extra={"error": str(e)})
+                if self.indoor_temp is None:
+                    self.indoor_temp = float(np.mean([self.comfort_min, self.comfort_max]))
         else:
-            self.indoor_temp = random.uniform(self.comfort_min, self.comfort_max)
+            self.indoor_temp = float(self.rng.uniform(self.comfort_min, self.comfort_max))
 
     def _real_kWh(self):
         """
@@ -96,56 +117,161 @@ class SmartHomeEnv:
         if self.mode == "real":
             try:
                 self.total_kWh = get_real_energy_usage()
-                print(f"⚡ Real energy usage: {self.total_kWh:.3f} kWh")
+                log.debug("real energy usage", extra={"total_kWh": self.total_kWh})
             except Exception as e:
-                print(f"⚠️ Energy sensor error: {e}, fallback to last known value.")
-                self.total_kWh = getattr(self, "total_kWh", 0.0)
+                SENSOR_FAILURES.inc(sensor="energy_meter")
+                log.warning("energy meter failed, using last known value", extra={"error": str(e)})
+                if self.total_kWh is None:
+                    self.total_kWh = 0.0
         else:
             self.total_kWh = 0.0
 
+    def _select_devices(self):
+        if self.home_name and self.home_name in self.home_manager.homes:
+            return {
+                d: self.manager.get_all_devices()[d]
+                for d in self.home_manager.get_home_devices(self.home_name)
+            }
+        return self.manager.get_all_devices()
+
+    def _load_rules(self):
+        with open(self.impact_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _source_mtimes(self):
+        return (
+            self.manager.catalog_path.stat().st_mtime_ns if self.manager.catalog_path.exists() else 0,
+            self.home_manager.homes_path.stat().st_mtime_ns if self.home_manager.homes_path.exists() else 0,
+            self.impact_path.stat().st_mtime_ns if self.impact_path.exists() else 0,
+        )
+
+    def _enumerate_actions(self, devices):
+        return [(device, perm) for device, info in devices.items() for perm in info.get("permissions", [])]
+
     def _build_action_space(self):
-        actions = []
-        for device, info in self.devices.items():
-            for perm in info.get("permissions", []):
-                actions.append((device, perm))
+        """
+        Enumerate (device, permission) actions and resolve their effects once into
+        per-action arrays (base_kWh, energy_factor, temp_change, is_climate), so
+        step() is pure indexing.
+        """
+        actions = self._enumerate_actions(self.devices)
+        self._compile_effects(actions)
         return actions
 
-    def reset(self):
-        print("🔄 Resetting environment...")
+    def _compile_effects(self, actions):
+        effects = [self._resolve_effect(device, perm) for device, perm in actions]
+        self.base_kWh = np.array([e[0] for e in effects], dtype=np.float64)
+        self.energy_factor = np.array([e[1] for e in effects], dtype=np.float64)
+        self.temp_change = np.array([e[2] for e in effects], dtype=np.float64)
+        self.is_climate = np.array([e[3] for e in effects], dtype=bool)
+        self._table_mtimes = self._source_mtimes()
+
+    def _match_rule(self, action):
+        """
+        Pick the impact-map rule for an action string. Every keyword contained in
+        the action is a candidate; precedence is, in order:
+          1. rules with an effect (energy_factor != 1 or temp_change != 0) beat neutral ones,
+          2. the match ending furthest right wins (modifiers come last: "keep_warm_off"),
+          3. the longer keyword wins,
+          4. alphabetical order.
+        returns the rule dict, or None when nothing matches
+        """
+        action_lower = action.lower()
+        best_key, best_rank = None, None
+        for keyword, rule in self.rules.items():
+            pos = action_lower.rfind(keyword)
+            if pos < 0:
+                continue
+            neutral = rule.get("energy_factor", 1.0) == 1.0 and rule.get("temp_change", 0.0) == 0.0
+            rank = (neutral, -(pos + len(keyword)), -len(keyword), keyword)
+            if best_rank is None or rank < best_rank:
+                best_key, best_rank = keyword, rank
+        return self.rules[best_key] if best_key is not None else None
+
+    def _resolve_effect(self, device, action):
+        rule = self._match_rule(action) or {}
+        base_kWh = self.devices[device]["base_kWh"]
+        energy_factor = rule.get("energy_factor", 1.0)
+        temp_change = rule.get("temp_change", 0.0)
+        # Temperature impact only applies to climate-related devices
+        is_climate = any(k in device.lower() for k in ["ac", "air", "heater"])
+        return base_kWh, energy_factor, temp_change, is_climate
+
+    def refresh_action_table(self, force=False):
+        """
+        Recompile the per-action effect table if the device catalog, the home's device
+        assignment or the impact map changed on disk since the last build. Called on every reset().
+        The action list itself is fixed for the life of the env: a policy indexes into it.
+        returns True when the table was recompiled
+        raises ActionSpaceChanged when the actions (count or order) changed
+        """
+        if not force and self._source_mtimes() == self._table_mtimes:
+            return False
+        with self.repository.transaction():
+            devices = self._select_devices()
+        actions = self._enumerate_actions(devices)
+        if actions != self.action_space:
+            # policies cached for the old action space are stale too
+            get_model_registry().invalidate(self.home_name)
+            log.error("action space changed, rebuild the environment and its policy", extra={
+                "home": self.home_name, "before": len(self.action_space), "after": len(actions),
+            })
+            raise ActionSpaceChanged(
+                f"Actions of home '{self.home_name}' changed ({len(self.action_space)} → {len(actions)}); "
+                "rebuild the environment and retrain or reload its policy"
+            )
+        self.devices = devices
+        self.rules = self._load_rules()
+        self._compile_effects(self.action_space)
+        return True
+
+    def reset(self, seed=None):
+        """seed: optional, re-seeds the simulation RNG before this episode"""
+        log.debug("resetting environment", extra={"home": self.home_name})
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self.refresh_action_table()
         if self.mode == "real":
             self._out_temp()
             self._indoor_temp()
             self._real_kWh()
         else:
-            self.indoor_temp = random.uniform(20, 26)
-            self.outdoor_temp = random.uniform(10, 40)
+            self.indoor_temp = float(self.rng.uniform(20, 26))
+            self.outdoor_temp = float(self.rng.uniform(10, 40))
             self.total_kWh = 0.0
 
         self.step_count = 0
-        return np.array([self.indoor_temp, self.total_kWh], dtype=np.float32)
+        if self.forecaster is not None:
+            self._refresh_forecast()
+        return self._state()
 
-    def step(self, action_index):
-        device, action = self.action_space[action_index]
-        base_kWh = self.devices[device]["base_kWh"]
+    def _refresh_forecast(self):
+        """Predict the next 24 hours in one batched call (real mode follows the wall clock)."""
+        if self.mode == "real":
+            now = datetime.now()
+            start_hour, is_weekend = now.hour, int(now.weekday() >= 5)
+        else:
+            start_hour, is_weekend = 0, 0
+        self._forecast = self.forecaster.forecast_day(
+            [self.indoor_temp], [self.outdoor_temp], start_hour=start_hour, is_weekend=is_weekend
+        )[0]
 
-        # === Simplified dynamics (driven by impact map) ===
-        action_lower = action.lower()
-        energy_factor = 1.0
-        temp_change = 0.0
+    def _state(self):
+        if self.forecaster is None:
+            return np.array([self.indoor_temp, self.total_kWh], dtype=np.float32)
+        predicted_temp, predicted_kWh = self._forecast[self.step_count % 24]
+        return np.array([self.indoor_temp, self.total_kWh, predicted_temp, predicted_kWh], dtype=np.float32)
 
-        # Look up the closest matching rule
-        for keyword, rule in self.rules.items():
-            if keyword in action_lower:
-                energy_factor = rule.get("energy_factor", 1.0)
-                temp_change = rule.get("temp_change", 0.0)
-                break
+    def step(self, action_index):
+        started = time.perf_counter()
+        device, action = self.action_space[action_index]
 
-        # Apply energy use
-        energy_used = base_kWh * energy_factor
+        # === Simplified dynamics (driven by the precompiled impact table) ===
+        energy_used = self.base_kWh[action_index] * self.energy_factor[action_index]
 
         # Apply temperature impact (only for climate-related devices)
-        if any(k in device.lower() for k in ["ac", "air", "heater"]):
-            self.indoor_temp += temp_change
+        if self.is_climate[action_index]:
+            self.indoor_temp += self.temp_change[action_index]
 
         # Natural drift toward outdoor temp
         self.indoor_temp += 0.05 * (self.outdoor_temp - self.indoor_temp)
@@ -169,7 +295,10 @@ class SmartHomeEnv:
         reward = -(energy_used * energy_weight + comfort_penalty * 1.90) + comfort_reward
 
         done = self.step_count >= 24  # one simulated day
-        next_state = np.array([self.indoor_temp, self.total_kWh], dtype=np.float32)
+        if self.forecaster is not None and self.step_count % 24 == 0:
+            self._refresh_forecast()  # live loops run past one day
+        next_state = self._state()
+        ENV_STEP_SECONDS.observe(time.perf_counter() - started, env="single")
 
         return next_state, reward, done, {
             "device": device,
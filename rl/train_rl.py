@@ -1,14 +1,38 @@
-import os
-import random
+import logging
 import numpy as np
-from pathlib import Path
 from tqdm import tqdm
 
 from rl.rl_agent import RLAgent
 from rl.rl_environment import SmartHomeEnv
+from rl.vec_environment import VecSmartHomeEnv
+from rl.weather_provider import get_fixture_weather_provider
 from training_kpi_logger import TrainingKPI
-from lstm_predictor import LSTMPredictor
-from paths import MODELS_DIR
+from forecast import get_forecaster
+from model_registry import get_model_registry
+from app_logging import get_logger
+
+log = get_logger("train")
+
+
+def _progress_bar(iterable, total):
+    # tqdm only when INFO is on (LOG_LEVEL=INFO); at the default level training is silent
+    return tqdm(iterable, total=total, desc="Training Progress", ncols=100,
+                disable=not log.isEnabledFor(logging.INFO))
+
+
+def _resume(agent, home_name, keep_replay):
+    """Load the home's saved checkpoint and, with keep_replay, its replay buffer into `agent`."""
+    registry = get_model_registry()
+    agent.load_model(registry.checkpoint_path(home_name))
+
+    # Replay buffer survives restarts so a resumed run doesn't start from an empty memory
+    replay_path = registry.replay_path(home_name)
+    if keep_replay and replay_path.exists():
+        try:
+            loaded = agent.memory.load(replay_path)
+            log.info("replay buffer restored", extra={"transitions": loaded})
+        except (ValueError, KeyError) as e:
+            log.warning("replay buffer ignored", extra={"error": str(e)})
 
 
 # === CONFIGURATION ===
@@ -17,118 +41,214 @@ from paths import MODELS_DIR
 # SAVE_EVERY = 10 # save model every 10 episodes
 #
 
-def train_rl_agent(HOME_NAME="Default", NUM_EPISODES=50, MAX_STEPS_PER_EPISODE=24, SAVE_EVERY=10):
-    print("=== 🏠 INITIALIZING ENVIRONMENT ===")
-    env = SmartHomeEnv(home_name=HOME_NAME)
+def train_rl_agent(HOME_NAME="Default", NUM_EPISODES=50, MAX_STEPS_PER_EPISODE=24, SAVE_EVERY=10,
+                   REPLAY_CAPACITY=100_000, KEEP_REPLAY=True, AGENT_PARAMS=None, SEED=None, RESUME=None,
+                   progress_callback=None, stop_event=None):
+    """
+    Train the DQN agent for one home.
+    AGENT_PARAMS: optional RLAgent hyperparameters (lr, gamma, epsilon_decay, ...)
+    SEED: seeded simulation mode — simulated weather/sensors and env + agent RNGs seeded,
+          so two runs with the same seed produce the same trajectory
+    RESUME: continue from the saved checkpoint and replay buffer (default: unless SEED is set)
+    progress_callback: called with each KPI row as it is logged
+    stop_event: anything with is_set(); checked between episodes to cancel the run
+    returns {"status": "completed" | "cancelled", "episodes": int, "model_path": str | None}
+    """
+    resume = SEED is None if RESUME is None else RESUME
+    # forecast model (models/multioutput_xgb_model.pkl or forecast_lstm.pt) → state gains
+    # [predicted_temp, predicted_kWh]; without one (or its backend) the simulated state is used
+    forecaster = get_forecaster()
+    # seeded runs read location/weather from the offline fixture, never the network
+    env = SmartHomeEnv(home_name=HOME_NAME, mode="real" if SEED is None else "sim", seed=SEED,
+                       forecaster=forecaster,
+                       weather_provider=None if SEED is None else get_fixture_weather_provider())
     action_size = len(env.action_space)
-
-    lstm_path = MODELS_DIR / "multioutput_xgb_model.pkl"
-    lstm = None
-
-    if lstm_path.exists():
-        print(f"✅ Found LSTM model at: {lstm_path}")
-        lstm = LSTMPredictor(model_path=lstm_path)
-        state_size = 4  # [current_temp, total_kWh, predicted_temp, predicted_kWh]
-    else:
-        print("⚠️ No LSTM model found. Using simulated state only.")
-        state_size = env.state_size  # fallback: 2 features
-
-    print(f"Environment ready → {action_size} actions, state size {state_size}")
-
-    print("=== 🤖 INITIALIZING AGENT ===")
-
-    agent = RLAgent(state_size=state_size, action_size=action_size)
-    agent.load_model(MODELS_DIR / f"checkpoints/{HOME_NAME.lower()}_final.pth")
-
-    tracker = TrainingKPI(home_name=HOME_NAME)
-    print("📊 KPI Logger ready.\n")
-
-    # === TRAINING LOOP ===
-    for episode in tqdm(range(1, NUM_EPISODES + 1), desc="Training Progress", ncols=100):
-        state = env.reset()
-        total_reward = 0.0
-        total_energy = 0.0
-        total_loss = 0.0
-
-        temps = []
-
-        for step in range(MAX_STEPS_PER_EPISODE):
-            if lstm:
-                # 1️⃣ Prepare input for LSTM (features)
-
-                # lstm_input = [env.indoor_temp, env.outdoor_temp, ......]
-
-                # LSTM predicts the next indoor temperature and kWh
-                predicted_kWh, predicted_temp = lstm.predict(lstm_input)
-
-                # Combine current & forecasted values
-                state_input = np.array([
-                    env.indoor_temp,  # current indoor temp
-                    env.total_kWh,  # current energy used so far
-                    predicted_temp,  # next predicted indoor temp
-                    predicted_kWh  # next predicted kWh
-                ], dtype=np.float32)
-            else:
-                # fallback if no LSTM
-                state_input = state
-
-            loss_value = agent.replay(batch_size=32)
-            total_loss += float(loss_value)
-            # Choose action
-            action_idx = agent.act(state_input)
-            next_state, reward, done, info = env.step(action_idx)
-
-            # Store experience
-            agent.remember(state, action_idx, reward, next_state, done)
-
-            # Training step
-            agent.replay(batch_size=32)
-
-            # Accumulate metrics
-            total_reward += reward
-            total_energy += info["energy_used"]
-            temps.append(info["indoor_temp"])
-
-            state = next_state
-            if done:
-                break
-
-        avg_temp = np.mean(temps)
-        comfort_min, comfort_max = env.comfort_min, env.comfort_max
-        comfort_violation = np.mean([
-            abs(t - np.clip(t, comfort_min, comfort_max)) for t in temps
-        ])
-
-        # === LOG KPIs ===
-        avg_loss = total_loss / MAX_STEPS_PER_EPISODE
-        tracker.log(
-            episode=int(episode),
-            reward=float(total_reward),
-            total_energy=float(total_energy),
-            avg_temp=float(avg_temp),
-            epsilon=float(agent.epsilon),
-            comfort_violation=float(comfort_violation),
-            loss=float(avg_loss)
-        )
-
-        print(f"\n📅 Episode {episode:03d} finished:")
-        print(f"   Total Reward     : {total_reward:.3f}")
-        print(f"   Total Energy (kWh): {total_energy:.3f}")
-        print(f"   Avg Temp (°C)    : {avg_temp:.2f}")
-        print(f"   Epsilon          : {agent.epsilon:.3f}")
-
-        # === SAVE CHECKPOINT ===
-        if episode % SAVE_EVERY == 0:
-            save_path = MODELS_DIR / f"checkpoints/{HOME_NAME.lower().replace(' ', '_')}_ep{episode:03d}.pth"
-            agent.save_model(save_path)
-
-    # === FINALIZE ===
-    final_path = MODELS_DIR / f"checkpoints/{HOME_NAME.lower().replace(' ', '_')}_final.pth"
-    agent.save_model(final_path)
-    tracker.plot(save=True, show=False)
-    tracker.summary(last_n=10)
-
-    print("\n=== ✅ TRAINING COMPLETE ===")
-    print(f"Model saved → {MODELS_DIR / f'checkpoints/{HOME_NAME}_final_agent_model.pth'}")
-    print(f"KPI log → {tracker.csv_path}")
-    print(f"Plots → {tracker.plots_dir}")
+    state_size = env.state_size  # 4 with a forecaster, else 2
+
+    log.info("training started", extra={"home": HOME_NAME, "episodes": NUM_EPISODES,
+                                        "actions": action_size, "state_size": state_size, "seed": SEED})
+
+    agent = RLAgent(state_size=state_size, action_size=action_size, memory_size=REPLAY_CAPACITY,
+                    seed=SEED, **(AGENT_PARAMS or {}))
+    if resume:
+        _resume(agent, HOME_NAME, KEEP_REPLAY)
+    replay_path = get_model_registry().replay_path(HOME_NAME)
+
+    tracker = TrainingKPI(home_name=HOME_NAME, on_log=progress_callback)
+    try:
+        # === TRAINING LOOP ===
+        for episode in _progress_bar(range(1, NUM_EPISODES + 1), NUM_EPISODES):
+            if stop_event is not None and stop_event.is_set():
+                log.warning("training cancelled", extra={"home": HOME_NAME, "episodes": episode - 1})
+                return {"status": "cancelled", "episodes": episode - 1, "model_path": None}
+
+            state = env.reset()
+            total_reward = 0.0
+            total_energy = 0.0
+            total_loss = 0.0
+
+            temps = []
+
+            for step in range(MAX_STEPS_PER_EPISODE):
+                loss_value = agent.replay(batch_size=32)
+                total_loss += float(loss_value)
+                # Choose action
+                action_idx = agent.act(state)
+                next_state, reward, done, info = env.step(action_idx)
+
+                # Store experience
+                agent.remember(state, action_idx, reward, next_state, done)
+
+                # Training step
+                agent.replay(batch_size=32)
+
+                # Accumulate metrics
+                total_reward += reward
+                total_energy += info["energy_used"]
+                temps.append(info["indoor_temp"])
+
+                state = next_state
+                if done:
+                    break
+
+            avg_temp = np.mean(temps)
+            comfort_min, comfort_max = env.comfort_min, env.comfort_max
+            comfort_violation = np.mean([
+                abs(t - np.clip(t, comfort_min, comfort_max)) for t in temps
+            ])
+
+            # === LOG KPIs ===
+            avg_loss = total_loss / MAX_STEPS_PER_EPISODE
+            tracker.log(
+                episode=int(episode),
+                reward=float(total_reward),
+                total_energy=float(total_energy),
+                avg_temp=float(avg_temp),
+                epsilon=float(agent.epsilon),
+                comfort_violation=float(comfort_violation),
+                loss=float(avg_loss)
+            )
+
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("episode finished", extra={
+                    "home": HOME_NAME, "episode": episode, "reward": float(total_reward),
+                    "total_energy_kWh": float(total_energy), "avg_temp": float(avg_temp), "epsilon": agent.epsilon,
+                })
+
+            # === SAVE CHECKPOINT ===
+            if episode % SAVE_EVERY == 0:
+                agent.save_model(get_model_registry().episode_checkpoint_path(HOME_NAME, episode))
+
+        # === FINALIZE ===
+        final_path = get_model_registry().checkpoint_path(HOME_NAME)
+        agent.save_model(final_path)
+        # new version + metadata; drops any cached copy of the previous policy
+        get_model_registry().register(HOME_NAME, episodes=NUM_EPISODES, state_size=state_size, action_size=action_size)
+        if KEEP_REPLAY:
+            agent.memory.save(replay_path)
+        if log.isEnabledFor(logging.INFO):
+            tracker.summary(last_n=10)
+
+        log.info("training complete", extra={"home": HOME_NAME, "episodes": NUM_EPISODES, "model_path": str(final_path),
+                                             "kpi_log": str(tracker.store.dir), "plots": str(tracker.plots_dir)})
+        return {"status": "completed", "episodes": NUM_EPISODES, "model_path": str(final_path)}
+    finally:
+        # pool workers are reused across jobs: release the KPI store's column files now
+        tracker.close()
+
+
+def train_rl_agent_vec(HOME_NAME="Default", NUM_ENVS=16, NUM_EPISODES=320, MAX_STEPS_PER_EPISODE=24,
+                       SAVE_EVERY=160, REPLAY_CAPACITY=100_000, BATCH_SIZE=32, KEEP_REPLAY=True,
+                       AGENT_PARAMS=None, SEED=None, RESUME=None, progress_callback=None, stop_event=None):
+    """
+    Train on NUM_ENVS copies of one home stepped in lockstep by VecSmartHomeEnv.
+    Every step acts on the whole batch with one forward pass; NUM_EPISODES counts
+    home-days, so each rollout contributes NUM_ENVS episodes (rounded up to whole rollouts).
+    SEED / RESUME: as in train_rl_agent
+    """
+    resume = SEED is None if RESUME is None else RESUME
+    env = VecSmartHomeEnv(home_names=HOME_NAME, num_envs=NUM_ENVS, max_steps=MAX_STEPS_PER_EPISODE, seed=SEED,
+                          forecaster=get_forecaster())
+    action_size = len(env.action_space)
+    # whole rollouts only: NUM_EPISODES is rounded up to a multiple of NUM_ENVS
+    num_rollouts = max(1, -(-NUM_EPISODES // NUM_ENVS))
+    log.info("vectorized training started", extra={"home": HOME_NAME, "num_envs": NUM_ENVS, "episodes": NUM_EPISODES,
+                                                   "episodes_run": num_rollouts * NUM_ENVS, "actions": action_size,
+                                                   "state_size": env.state_size, "seed": SEED})
+
+    agent = RLAgent(state_size=env.state_size, action_size=action_size, memory_size=REPLAY_CAPACITY,
+                    seed=SEED, **(AGENT_PARAMS or {}))
+    if resume:
+        _resume(agent, HOME_NAME, KEEP_REPLAY)
+    replay_path = get_model_registry().replay_path(HOME_NAME)
+
+    tracker = TrainingKPI(home_name=HOME_NAME, on_log=progress_callback)
+    try:
+
+        episode = 0
+        for rollout in _progress_bar(range(1, num_rollouts + 1), num_rollouts):
+            if stop_event is not None and stop_event.is_set():
+                log.warning("training cancelled", extra={"home": HOME_NAME, "episodes": episode})
+                return {"status": "cancelled", "episodes": episode, "model_path": None}
+
+            states = env.reset()
+            total_reward = np.zeros(NUM_ENVS)
+            total_energy = np.zeros(NUM_ENVS)
+            total_loss = 0.0
+            temps = np.zeros((MAX_STEPS_PER_EPISODE, NUM_ENVS))
+
+            for step in range(MAX_STEPS_PER_EPISODE):
+                actions = agent.act_batch(states)
+                next_states, rewards, dones, info = env.step(actions)
+                agent.remember_batch(states, actions, rewards, next_states, dones)
+                total_loss += float(agent.replay(batch_size=BATCH_SIZE))
+
+                total_reward += rewards
+                total_energy += info["energy_used"]
+                temps[step] = info["indoor_temp"]
+
+                states = next_states
+                if dones.all():
+                    break
+
+            temps = temps[:step + 1]
+            avg_temp = temps.mean(axis=0)
+            comfort_violation = np.abs(temps - np.clip(temps, env.comfort_min, env.comfort_max)).mean(axis=0)
+            avg_loss = total_loss / MAX_STEPS_PER_EPISODE
+
+            for i in range(NUM_ENVS):
+                episode += 1
+                tracker.log(
+                    episode=episode,
+                    reward=float(total_reward[i]),
+                    total_energy=float(total_energy[i]),
+                    avg_temp=float(avg_temp[i]),
+                    epsilon=float(agent.epsilon),
+                    comfort_violation=float(comfort_violation[i]),
+                    loss=float(avg_loss)
+                )
+
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("rollout finished", extra={
+                    "home": HOME_NAME, "first_episode": episode - NUM_ENVS + 1, "last_episode": episode,
+                    "mean_reward": float(total_reward.mean()), "mean_energy_kWh": float(total_energy.mean()),
+                    "epsilon": agent.epsilon,
+                })
+
+            # save when this rollout crossed a multiple of SAVE_EVERY
+            if episode // SAVE_EVERY > (episode - NUM_ENVS) // SAVE_EVERY:
+                agent.save_model(get_model_registry().episode_checkpoint_path(HOME_NAME, episode))
+
+        final_path = get_model_registry().checkpoint_path(HOME_NAME)
+        agent.save_model(final_path)
+        get_model_registry().register(HOME_NAME, episodes=episode, state_size=env.state_size, action_size=action_size)
+        if KEEP_REPLAY:
+            agent.memory.save(replay_path)
+        if log.isEnabledFor(logging.INFO):
+            tracker.summary(last_n=10)
+
+        log.info("training complete", extra={"home": HOME_NAME, "episodes": episode, "model_path": str(final_path),
+                                             "kpi_log": str(tracker.store.dir)})
+        return {"status": "completed", "episodes": episode, "model_path": str(final_path)}
+    finally:
+        tracker.close()
@@ -0,0 +1,136 @@
+import time
+
+import numpy as np
+
+from forecast import FORECAST_SIZE
+from metrics import ENV_STEP_SECONDS
+from rl.rl_environment import SmartHomeEnv
+
+
+class VecSmartHomeEnv:
+    """
+    Steps N simulated homes in lockstep with NumPy arrays instead of N Python envs.
+
+    Either pass a list of home names (one env per home; the homes must expose the
+    same action space) or a single home name with num_envs copies, each with its own
+    randomized outdoor temperature. Dynamics and reward match SmartHomeEnv.step.
+    With a forecaster, states carry the forecast like SmartHomeEnv's, predicted for
+    all envs × 24 hours in one batched call per simulated day.
+    """
+
+    def __init__(self, home_names="Default", num_envs=None, comfort_range=(20, 27), max_steps=24, seed=None,
+                 forecaster=None):
+        if isinstance(home_names, str) or home_names is None:
+            home_names = [home_names] * (num_envs or 1)
+        elif num_envs is not None and num_envs != len(home_names):
+            raise ValueError("num_envs must match the number of home names")
+
+        self.home_names = list(home_names)
+        self.num_envs = len(self.home_names)
+        self.max_steps = max_steps
+        self.rng = np.random.default_rng(seed)
+
+        # One template env per distinct home supplies devices, impact map and comfort range
+        templates = {}
+        for name in dict.fromkeys(self.home_names):
+            templates[name] = SmartHomeEnv(home_name=name, mode="sim", comfort_range=comfort_range)
+
+        first = templates[self.home_names[0]]
+        for name, env in templates.items():
+            if env.action_space != first.action_space:
+                raise ValueError(f"Home '{name}' has a different action space; vectorized homes must share one.")
+
+        self.template = first
+        self.forecaster = forecaster
+        self._forecast = None  # (num_envs, 24, FORECAST_SIZE)
+        self.state_size = first.state_size + (FORECAST_SIZE if forecaster is not None else 0)
+        self._sync_action_table()
+
+        self.comfort_min = np.array([templates[n].comfort_min for n in self.home_names], dtype=np.float64)
+        self.comfort_max = np.array([templates[n].comfort_max for n in self.home_names], dtype=np.float64)
+        self.comfort_center = (self.comfort_min + self.comfort_max) / 2
+
+        self.indoor_temp = np.zeros(self.num_envs)
+        self.outdoor_temp = np.zeros(self.num_envs)
+        self.total_kWh = np.zeros(self.num_envs)
+        self.step_count = 0
+
+    def _sync_action_table(self):
+        # Per-action effect table precompiled by SmartHomeEnv._build_action_space
+        self.action_space = self.template.action_space
+        self.base_kWh = self.template.base_kWh
+        self.energy_factor = self.template.energy_factor
+        self.temp_change = self.template.temp_change
+        self.is_climate = self.template.is_climate
+
+    def _states(self):
+        states = np.stack([self.indoor_temp, self.total_kWh], axis=1).astype(np.float32)
+        if self.forecaster is None:
+            return states
+        return np.concatenate([states, self._forecast[:, self.step_count % 24]], axis=1)
+
+    def _refresh_forecast(self):
+        self._forecast = self.forecaster.forecast_day(self.indoor_temp, self.outdoor_temp)
+
+    def reset(self, indoor_temp=None, outdoor_temp=None, comfort_range=None, seed=None):
+        """
+        Random starts by default (drawn from self.rng; seed re-seeds it). Pass (num_envs,)
+        arrays to pin the starting indoor and outdoor temperatures, and
+        comfort_range=(mins, maxs) to override each env's comfort band
+        (used by rl/policy_eval.py to replay fixed scenarios).
+        """
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        if self.template.refresh_action_table():
+            self._sync_action_table()
+        if comfort_range is not None:
+            self.comfort_min = np.broadcast_to(np.asarray(comfort_range[0], dtype=np.float64), self.num_envs).copy()
+            self.comfort_max = np.broadcast_to(np.asarray(comfort_range[1], dtype=np.float64), self.num_envs).copy()
+            self.comfort_center = (self.comfort_min + self.comfort_max) / 2
+        self.indoor_temp = (
+            self.rng.uniform(20, 26, self.num_envs) if indoor_temp is None
+            else np.array(indoor_temp, dtype=np.float64).reshape(self.num_envs)
+        )
+        self.outdoor_temp = (
+            self.rng.uniform(10, 40, self.num_envs) if outdoor_temp is None
+            else np.array(outdoor_temp, dtype=np.float64).reshape(self.num_envs)
+        )
+        self.total_kWh = np.zeros(self.num_envs)
+        self.step_count = 0
+        if self.forecaster is not None:
+            self._refresh_forecast()
+        return self._states()
+
+    def step(self, actions):
+        """
+        actions: int array of shape (num_envs,) with one action index per home
+        returns (next_states, rewards, dones, info) with a leading num_envs axis
+        """
+        started = time.perf_counter()
+        actions = np.asarray(actions, dtype=np.int64)
+
+        energy_used = self.base_kWh[actions] * self.energy_factor[actions]
+        self.indoor_temp += np.where(self.is_climate[actions], self.temp_change[actions], 0.0)
+        self.indoor_temp += 0.05 * (self.outdoor_temp - self.indoor_temp)
+
+        self.total_kWh += energy_used
+        self.step_count += 1
+
+        # === Reward Function (same as SmartHomeEnv.step) ===
+        comfortable = (self.comfort_min <= self.indoor_temp) & (self.indoor_temp <= self.comfort_max)
+        comfort_penalty = np.where(comfortable, 0.0, np.abs(self.indoor_temp - self.comfort_center))
+        comfort_reward = np.where(comfortable, 1.5, 0.0)
+        energy_weight = np.where(energy_used < 3.0, 0.8, 1.0)
+        rewards = -(energy_used * energy_weight + comfort_penalty * 1.90) + comfort_reward
+
+        dones = np.full(self.num_envs, self.step_count >= self.max_steps)
+        if self.forecaster is not None and self.step_count % 24 == 0:
+            self._refresh_forecast()
+        ENV_STEP_SECONDS.observe(time.perf_counter() - started, env="vec")
+
+        return self._states(), rewards, dones, {
+            "actions": actions,
+            "energy_used": energy_used,
+            "indoor_temp": self.indoor_temp.copy(),
+            "outdoor_temp": self.outdoor_temp.copy(),
+        }
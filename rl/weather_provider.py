@@ -0,0 +1,190 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app_logging import get_logger
+from metrics import WEATHER_FETCH_FAILURES, WEATHER_FETCH_SECONDS
+from paths import DATA_DIR
+
+log = get_logger("weather")
+
+DEFAULT_LOCATION = {"city": "Istanbul", "country": "TR", "lat": 41.0082, "lon": 28.9784}
+DEFAULT_OUTDOOR_TEMP = 24.0
+
+
+class TTLCache:
+    """
+    Thread-safe TTL cache with request coalescing: concurrent misses for the same
+    key wait on a single fetch instead of each issuing their own.
+    """
+
+    def __init__(self):
+        self._entries = {}  # key -> (expires_at, value)
+        self._inflight = {}  # key -> Future
+        self._lock = threading.Lock()
+
+    def get_or_fetch(self, key, fetch):
+        """fetch() must return (value, ttl_sec)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+            pending = self._inflight.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._inflight[key] = Future()
+
+        if not owner:
+            return pending.result()
+
+        try:
+            value, ttl = fetch()
+            with self._lock:
+                self._entries[key] = (time.monotonic() + ttl, value)
+            pending.set_result(value)
+            return value
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class HTTPWeatherProvider:
+    """
+    ipinfo.io geolocation + Open-Meteo weather over one pooled requests.Session.
+    Results are cached per rounded lat/lon; failures fall back to defaults and are
+    cached for a shorter time so an outage doesn't cost a timeout on every call.
+    """
+
+    def __init__(self, ttl_sec=600, location_ttl_sec=3600, failure_ttl_sec=60, precision=2, timeout=5):
+        self.ttl_sec = ttl_sec
+        self.location_ttl_sec = location_ttl_sec
+        self.failure_ttl_sec = failure_ttl_sec
+        self.precision = precision
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.cache = TTLCache()
+
+    def get_location(self):
+        return dict(self.cache.get_or_fetch("location", self._fetch_location))
+
+    def get_outdoor_temp(self, lat, lon):
+        key = ("temp", round(lat, self.precision), round(lon, self.precision))
+        return self.cache.get_or_fetch(key, lambda: self._fetch_outdoor_temp(lat, lon))
+
+    def _fetch_location(self):
+        started = time.perf_counter()
+        try:
+            r = self.session.get("https://ipinfo.io/json", timeout=self.timeout)
+            data = r.json()
+            WEATHER_FETCH_SECONDS.observe(time.perf_counter() - started, kind="location")
+
+            # ipinfo returns "loc" as "lat,lon"
+            loc = data.get("loc", "41.0082,28.9784").split(",")
+            return {
+                "city": data.get("city", "Istanbul"),
+                "country": data.get("country", "TR"),
+                "lat": float(loc[0]),
+                "lon": float(loc[1]),
+            }, self.location_ttl_sec
+        except Exception as e:
+            WEATHER_FETCH_FAILURES.inc(kind="location")
+            log.warning("location lookup failed, falling back to Istanbul", extra={"error": str(e)})
+            return dict(DEFAULT_LOCATION), self.failure_ttl_sec
+
+    def _fetch_outdoor_temp(self, lat, lon):
+        started = time.perf_counter()
+        try:
+            r = self.session.get(
+                "https://api.open-meteo.com/v1/forecast",
+                params={"latitude": lat, "longitude": lon, "current": "temperature_2m"},
+                timeout=self.timeout,
+            )
+            temp = r.json()["current"]["temperature_2m"]
+            WEATHER_FETCH_SECONDS.observe(time.perf_counter() - started, kind="temperature")
+            return temp, self.ttl_sec
+        except Exception as e:
+            WEATHER_FETCH_FAILURES.inc(kind="temperature")
+            log.warning("weather API failed, using the default temperature",
+                        extra={"error": str(e), "outdoor_temp": DEFAULT_OUTDOOR_TEMP})
+            return DEFAULT_OUTDOOR_TEMP, self.failure_ttl_sec
+
+
+class FixtureWeatherProvider:
+    """
+    Offline provider that answers from a JSON file, for training runs and tests:
+    {"location": {...}, "outdoor_temp": {"default": 24.0, "41.01,28.98": 26.5}}
+    Temperature keys are "lat,lon" rounded to `precision` decimals.
+    """
+
+    def __init__(self, path=DATA_DIR / "weather_fixture.json", precision=2):
+        self.path = Path(path)
+        self.precision = precision
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.location = {**DEFAULT_LOCATION, **data.get("location", {})}
+        self.temps = data.get("outdoor_temp", {})
+
+    def get_location(self):
+        return dict(self.location)
+
+    def get_outdoor_temp(self, lat, lon):
+        key = f"{round(lat, self.precision)},{round(lon, self.precision)}"
+        return float(self.temps.get(key, self.temps.get("default", DEFAULT_OUTDOOR_TEMP)))
+
+
+_provider = None
+_fixture_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_weather_provider():
+    """
+    Process-wide provider. WEATHER_PROVIDER=fixture (optionally with WEATHER_FIXTURE=<path>)
+    selects the offline fixture provider; anything else uses HTTP.
+    """
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            if os.environ.get("WEATHER_PROVIDER", "http").lower() == "fixture":
+                fixture = os.environ.get("WEATHER_FIXTURE")
+                _provider = FixtureWeatherProvider(fixture) if fixture else FixtureWeatherProvider()
+            else:
+                _provider = HTTPWeatherProvider()
+        return _provider
+
+
+def get_fixture_weather_provider():
+    """
+    Process-wide offline provider for simulated/seeded runs, whatever WEATHER_PROVIDER says:
+    those must never depend on the network. WEATHER_FIXTURE=<path> overrides the fixture file.
+    """
+    global _fixture_provider
+    with _provider_lock:
+        if _fixture_provider is None:
+            fixture = os.environ.get("WEATHER_FIXTURE")
+            _fixture_provider = FixtureWeatherProvider(fixture) if fixture else FixtureWeatherProvider()
+        return _fixture_provider
+
+
+def set_weather_provider(provider):
+    """Swap the process-wide provider (e.g. a FixtureWeatherProvider in tests)."""
+    global _provider
+    with _provider_lock:
+        _provider = provider
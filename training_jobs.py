@@ -0,0 +1,200 @@
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from metrics import registry
+from model_registry import home_slug
+
+
+class JobConflictError(RuntimeError):
+    """Raised when a home already has a queued or running training job."""
+
+
+def _run_training_job(job_id, home, episodes, params, progress, stop_event):
+    """Entry point executed inside a worker process."""
+    import torch
+    from paths import LOGS_DIR
+    from profiler import SamplingProfiler
+    from rl.train_rl import train_rl_agent, train_rl_agent_vec
+
+    # One intra-op thread per worker: parallelism comes from running several homes at once
+    torch.set_num_threads(1)
+    # Pool workers are reused: metrics shipped back must cover this job only
+    registry.reset()
+    progress["status"] = "running"
+    progress["started_at"] = datetime.now().isoformat()
+
+    def on_log(row):
+        progress.update({
+            "episode": row["episode"],
+            "reward": row["reward"],
+            "total_energy_kWh": row["total_energy_kWh"],
+            "epsilon": row["epsilon"],
+            "loss": row["loss"],
+            "metrics": registry.snapshot(),
+        })
+
+    params = dict(params)
+    num_envs = params.pop("NUM_ENVS", None)
+    profiler = SamplingProfiler().start() if params.pop("PROFILE", False) else None
+    try:
+        if num_envs:
+            result = train_rl_agent_vec(HOME_NAME=home, NUM_ENVS=num_envs, NUM_EPISODES=episodes, **params,
+                                        progress_callback=on_log, stop_event=stop_event)
+        else:
+            result = train_rl_agent(HOME_NAME=home, NUM_EPISODES=episodes, **params,
+                                    progress_callback=on_log, stop_event=stop_event)
+    finally:
+        progress["metrics"] = registry.snapshot()
+        if profiler is not None:
+            profiler.stop()
+            profile_path = LOGS_DIR / home / "profiles" / f"train_{job_id}.folded"
+            progress["profile_path"] = str(profiler.write_folded(profile_path))
+            progress["profile_samples"] = profiler.samples
+    return {**result, "profile_path": progress.get("profile_path")} if profiler else result
+
+
+class TrainingJobManager:
+    """
+    Runs training jobs in a bounded process pool and tracks their progress.
+    Jobs are (home, episodes, hyperparameters); submit() returns immediately with a job id.
+    """
+
+    TRAIN_PARAMS = {"MAX_STEPS_PER_EPISODE", "SAVE_EVERY", "REPLAY_CAPACITY", "KEEP_REPLAY", "NUM_ENVS",
+                    "SEED", "RESUME"}
+    AGENT_PARAMS = {"lr", "gamma", "epsilon", "epsilon_decay", "epsilon_min"}
+    JOB_PARAMS = {"PROFILE"}  # handled by the worker itself, e.g. PROFILE=true → folded-stack profile
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.jobs = {}
+        # home slug → id of its queued/running job: one job per home, since jobs share checkpoint files
+        self._active = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._mp_manager = None
+
+    def _ensure_pool(self):
+        # Started lazily: the pool and the shared-state manager are separate processes
+        if self._executor is None:
+            ctx = multiprocessing.get_context("spawn")
+            self._mp_manager = ctx.Manager()
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=ctx)
+
+    def submit(self, home, episodes=30, hyperparameters=None):
+        params, agent_params = {}, {}
+        for key, value in (hyperparameters or {}).items():
+            if key in self.TRAIN_PARAMS or key in self.JOB_PARAMS:
+                params[key] = value
+            elif key in self.AGENT_PARAMS:
+                agent_params[key] = value
+            else:
+                raise ValueError(f"Unknown hyperparameter '{key}'")
+        if agent_params:
+            params["AGENT_PARAMS"] = agent_params
+
+        with self._lock:
+            active = self._active.get(home_slug(home))
+            if active is not None:
+                raise JobConflictError(f"Home '{home}' already has an active training job ({active})")
+            self._ensure_pool()
+            job_id = uuid.uuid4().hex[:12]
+            progress = self._mp_manager.dict(status="queued")
+            stop_event = self._mp_manager.Event()
+            future = self._executor.submit(_run_training_job, job_id, home, episodes, params, progress, stop_event)
+            self.jobs[job_id] = {
+                "job_id": job_id,
+                "home": home,
+                "episodes": episodes,
+                "hyperparameters": hyperparameters or {},
+                "submitted_at": datetime.now().isoformat(),
+                "finished_at": None,
+                "result": None,
+                "error": None,
+                "_progress": progress,
+                "_stop": stop_event,
+                "_future": future,
+            }
+            self._active[home_slug(home)] = job_id
+        future.add_done_callback(lambda f, jid=job_id: self._on_done(jid, f))
+        return self.status(job_id)
+
+    def _on_done(self, job_id, future):
+        job = self.jobs[job_id]
+        job["finished_at"] = datetime.now().isoformat()
+        # fold the worker's final metrics into this process's /metrics counters
+        try:
+            registry.merge(job["_progress"].get("metrics", {}))
+        except (EOFError, OSError, BrokenPipeError):
+            pass
+        job["_metrics_merged"] = True
+        with self._lock:
+            if self._active.get(home_slug(job["home"])) == job_id:
+                del self._active[home_slug(job["home"])]
+        if future.cancelled():
+            job["result"] = {"status": "cancelled"}
+        elif future.exception() is not None:
+            job["error"] = repr(future.exception())
+        else:
+            job["result"] = future.result()
+
+    def status(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        try:
+            progress = dict(job["_progress"])
+        except (EOFError, OSError, BrokenPipeError):
+            progress = {}
+
+        if job["error"]:
+            state = "failed"
+        elif job["result"]:
+            state = job["result"].get("status", "completed")
+        elif job["_stop"].is_set():
+            state = "cancelling"
+        else:
+            state = progress.get("status", "queued")
+
+        info = {k: v for k, v in job.items() if not k.startswith("_")}
+        info["status"] = state
+        info["progress"] = {k: v for k, v in progress.items() if k not in ("status", "metrics")}
+        return info
+
+    def running_metrics(self):
+        """Latest metric snapshots of jobs whose totals aren't merged into the registry yet."""
+        snapshots = []
+        for job in list(self.jobs.values()):
+            if job.get("_metrics_merged"):
+                continue
+            try:
+                snapshot = job["_progress"].get("metrics")
+            except (EOFError, OSError, BrokenPipeError):
+                continue
+            if snapshot:
+                snapshots.append(snapshot)
+        return snapshots
+
+    def list_jobs(self):
+        return [self.status(job_id) for job_id in list(self.jobs)]
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        # Queued jobs never start; running ones stop at the next episode boundary
+        if not job["_future"].cancel():
+            job["_stop"].set()
+        return self.status(job_id)
+
+    def shutdown(self, wait=False):
+        if self._executor is not None:
+            for job in self.jobs.values():
+                job["_stop"].set()
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._mp_manager.shutdown()
+            self._executor = None
+            self._mp_manager = None
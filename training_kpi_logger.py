@@ -1,29 +1,26 @@
-import csv
+import time
 from datetime import datetime
-from pathlib import Path
-import matplotlib.pyplot as plt
-import pandas as pd
 
+from app_logging import get_logger
+from kpi_plots import draw_kpi_plot, get_kpi_plot_renderer
+from kpi_store import KPIStore, home_dir_name
+from metrics import TRAINING_EPISODES, TRAINING_EPSILON, TRAINING_LOSS, TRAINING_REWARD
 from paths import LOGS_DIR
 
+log = get_logger("kpi")
+
 
 class TrainingKPI:
-    def __init__(self, home_name):
-        self.home_name = home_name.strip().title().replace(" ", "_")
+    def __init__(self, home_name, on_log=None):
+        self.home_name = home_dir_name(home_name)
         self.home_log_dir = LOGS_DIR / self.home_name
         self.home_log_dir.mkdir(parents=True, exist_ok=True)
 
-        self.csv_path = self.home_log_dir / "training_kpis.csv"
-        self.plots_dir = self.home_log_dir
-
-        # Create header if not exist
-        if not self.csv_path.exists():
-            with open(self.csv_path, mode="w", newline="", encoding="utf-8") as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    "timestamp", "episode", "reward", "total_energy_kWh",
-                    "avg_temp", "epsilon", "comfort_violation", "loss"
-                ])
+        # columnar history (logs/<Home>/kpis/); imports a legacy training_kpis.csv once
+        self.store = KPIStore(home_name)
+        self.run = self.store.next_run()
+        self.plots_dir = self.home_log_dir / "plots"
+        self.on_log = on_log  # optional callback(row: dict) for live progress
 
     def log(
             self,
@@ -36,46 +33,51 @@ class TrainingKPI:
             loss: float = None,
     ):
         """Log one episode of training progress"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        with open(self.csv_path, mode="a", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                timestamp, episode, reward, total_energy,
-                avg_temp, epsilon, comfort_violation, loss or 0.0
-            ])
-
-    def plot(self, save=True, show=True):
-        """Visualize and optionally save the reward, epsilon, and energy trends"""
-        df = pd.read_csv(self.csv_path)
+        now = time.time()
+        self.store.append({
+            "timestamp": now, "run": self.run, "episode": episode, "reward": reward,
+            "total_energy_kWh": total_energy, "avg_temp": avg_temp, "epsilon": epsilon,
+            "comfort_violation": comfort_violation, "loss": loss or 0.0,
+        })
 
-        plt.figure(figsize=(10, 5))
-        plt.plot(df["episode"], df["reward"], label="Reward", color="blue", linewidth=2)
-        plt.plot(df["episode"], df["total_energy_kWh"], label="Energy (kWh)", color="orange", linewidth=1.5)
-        plt.plot(df["episode"], df["epsilon"], label="Epsilon", color="green", linestyle="--")
+        TRAINING_EPISODES.inc(home=self.home_name)
+        TRAINING_EPSILON.set(epsilon, home=self.home_name)
+        TRAINING_LOSS.set(loss or 0.0, home=self.home_name)
+        TRAINING_REWARD.set(reward, home=self.home_name)
 
-        plt.title(f"Training KPIs - {self.home_name}")
-        plt.xlabel("Episode")
-        plt.ylabel("Value")
-        plt.legend()
-        plt.grid(True)
-        plt.tight_layout()
+        if self.on_log:
+            self.on_log({
+                "timestamp": datetime.fromtimestamp(now).strftime("%Y-%m-%d %H:%M:%S"), "episode": episode, "reward": reward,
+                "total_energy_kWh": total_energy, "avg_temp": avg_temp, "epsilon": epsilon,
+                "comfort_violation": comfort_violation, "loss": loss or 0.0,
+            })
 
+    def plot(self, save=True, show=True):
+        """
+        Visualize the reward, epsilon, and energy trends. Saved PNG/PDF artifacts are cached
+        by KPI version (see kpi_plots); matplotlib is only imported here, never at import time.
+        """
         if save:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            png_path = self.plots_dir / f"{self.home_name}_kpi_{timestamp}.png"
-            pdf_path = self.plots_dir / f"{self.home_name}_kpi_{timestamp}.pdf"
-            plt.savefig(png_path)
-            plt.savefig(pdf_path)
-            print(f"📊 KPI plot saved → {png_path.name}, {pdf_path.name}")
+            renderer = get_kpi_plot_renderer()
+            paths = [renderer.submit(self.home_name, fmt).result() for fmt in ("png", "pdf")]
+            log.info("KPI plot saved", extra={"paths": [str(p) for p in paths]})
 
         if show:
+            import matplotlib.pyplot as plt
+
+            fig, ax = plt.subplots(figsize=(10, 5))
+            draw_kpi_plot(ax, self.store)
+            fig.tight_layout()
             plt.show()
-        else:
-            plt.close()
 
     def summary(self, last_n=10):
         """Print recent episode stats"""
-        df = pd.read_csv(self.csv_path)
-        recent = df.tail(last_n)
+        columns = ["episode", "reward", "total_energy_kWh", "avg_temp", "epsilon"]
+        recent = self.store.tail(last_n, names=columns)
         print(f"=== 📈 Last {last_n} Episodes Summary ===")
-        print(recent[["episode", "reward", "total_energy_kWh", "avg_temp", "epsilon"]].to_string(index=False))
+        print("  ".join(f"{c:>16}" for c in columns))
+        for row in zip(*(recent[c].tolist() for c in columns)):
+            print("  ".join(f"{v:>16.4g}" for v in row))
+
+    def close(self):
+        self.store.close()